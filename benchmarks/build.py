@@ -0,0 +1,80 @@
+"""
+Benchmark batch component creation against the per-element construction loop.
+
+Usage:
+    python benchmarks/build.py --sizes 1000 10000 50000
+"""
+import argparse
+import random
+import time
+
+import pygridsim.defaults as defaults
+from pygridsim.core import PyGridSim
+
+
+def _loop_load_nodes(dss, num):
+    # Per-element construction, as add_load_nodes did before batch creation
+    for count in range(num):
+        load = dss.Load.new('load' + str(count))
+        load.Bus1 = 'load' + str(count)
+        load.Phases = defaults.PHASES
+        load.kV = random.uniform(*defaults.HOUSE_KV)
+        load.kW = random.uniform(*defaults.HOUSE_KW)
+        load.kvar = random.uniform(*defaults.HOUSE_KVAR)
+        load.Daily = 'default'
+
+
+def _loop_generators(dss, num):
+    for count in range(num):
+        generator = dss.Generator.new('generator' + str(count))
+        generator.Bus1 = 'generator' + str(count)
+        generator.Phases = defaults.PHASES
+        generator.kV = random.uniform(*defaults.SMALL_GEN_KV)
+        generator.kW = random.uniform(*defaults.SMALL_GEN_KW)
+
+
+def _loop_pv(dss, num):
+    for count in range(num):
+        pv = dss.PVSystem.new('pv' + str(count))
+        pv.Bus1 = 'load' + str(count)
+        pv.Phases = defaults.PHASES
+        pv.kV = random.uniform(*defaults.SOLAR_PANEL_BASE_KV)
+
+
+def _batch_load_nodes(circuit, num):
+    circuit.add_load_nodes(num=num)
+
+
+def _batch_generators(circuit, num):
+    circuit.add_generators(num=num)
+
+
+def _batch_pv(circuit, num):
+    circuit.add_PVSystems(load_nodes=['load' + str(count) for count in range(num)])
+
+
+def _time(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def main(sizes):
+    cases = [
+        ("loads", _loop_load_nodes, _batch_load_nodes),
+        ("generators", _loop_generators, _batch_generators),
+        ("pv", _loop_pv, _batch_pv),
+    ]
+    print(f"{'component':<12}{'num':>10}{'loop (s)':>12}{'batch (s)':>12}{'speedup':>10}")
+    for num in sizes:
+        for component, loop, batch in cases:
+            loop_time = _time(loop, PyGridSim().dss, num)
+            batch_time = _time(batch, PyGridSim(), num)
+            print(f"{component:<12}{num:>10}{loop_time:>12.3f}{batch_time:>12.3f}"
+                  f"{loop_time / batch_time:>9.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    main(parser.parse_args().sizes)
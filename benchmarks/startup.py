@@ -0,0 +1,69 @@
+"""
+Benchmark import and first-call latency of pygridsim in fresh interpreters.
+
+Every run starts a new Python process, so nothing is cached in memory between runs.
+Reports the median of every phase, and whether the engine was loaded before the first
+component was added.
+
+Usage:
+    python benchmarks/startup.py --runs 10 --output startup.json
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+PHASES = ["import", "PyGridSim()", "get_types", "first component", "first solve"]
+
+# runs in the fresh process, printing the seconds of every phase as JSON
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import pygridsim
+marks = [time.perf_counter()]
+circuit = pygridsim.PyGridSim()
+marks.append(time.perf_counter())
+circuit.get_types("load")
+marks.append(time.perf_counter())
+engine_loaded = "altdss" in sys.modules
+circuit.update_source()
+marks.append(time.perf_counter())
+circuit.solve()
+marks.append(time.perf_counter())
+seconds = [mark - previous for previous, mark in zip([start] + marks, marks)]
+print(json.dumps({"seconds": seconds, "engine_loaded": engine_loaded}))
+"""
+
+
+def _run_once():
+    output = subprocess.run([sys.executable, "-c", PROBE], check=True, capture_output=True,
+                            text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(runs, output):
+    samples = [_run_once() for _ in range(runs)]
+    results = {
+        phase: statistics.median(sample["seconds"][index] for sample in samples)
+        for index, phase in enumerate(PHASES)
+    }
+    engine_loaded = any(sample["engine_loaded"] for sample in samples)
+
+    print(f"{'phase':<18}{'median (s)':>12}")
+    for phase, seconds in results.items():
+        print(f"{phase:<18}{seconds:>12.4f}")
+    print(f"engine loaded before the first component: {engine_loaded}")
+
+    if output:
+        with open(output, "w", encoding="utf-8") as output_file:
+            json.dump({"runs": runs, "median_seconds": results,
+                       "engine_loaded_early": engine_loaded}, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="fresh processes to time")
+    parser.add_argument("--output", default="", help="path of the JSON results")
+    args = parser.parse_args()
+    main(args.runs, args.output)
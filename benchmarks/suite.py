@@ -0,0 +1,189 @@
+"""
+Benchmark build, solve and results() of PyGridSim circuits across circuit sizes.
+
+Sizes up to FAULT_STUDY_MAX_BUSES also time a fault study of a feeder from generate_feeder.
+
+Every size runs in a fresh process, so its peak memory is not inflated by earlier sizes.
+Wall times are the best of --repeat runs; Python peak memory comes from one more run under
+tracemalloc, and the process high-water mark (max RSS) also covers the engine's memory.
+
+Usage:
+    python benchmarks/suite.py --sizes 10 1000 10000 100000 --output benchmark.json
+    python benchmarks/suite.py --sizes 10 1000 --compare benchmark.json --threshold 1.5
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import altdss
+import numpy as np
+
+import pygridsim
+from pygridsim.core import PyGridSim
+from pygridsim.feeders import generate_feeder
+
+QUERIES = ["Voltages", "Losses", "TotalPower", "RealLoss", "ReactiveLoss", "RealPower",
+           "ReactivePower"]
+BRANCHING = 3
+PV_SHARE = 0.1
+SEED = 0
+# slowdowns smaller than this are timer noise, not regressions
+MIN_REGRESSION_SECONDS = 0.001
+# the engine's fault study solution grows about quadratically with the buses
+FAULT_STUDY_MAX_BUSES = 10000
+
+
+def _connections(num_loads):
+    # a complete tree rooted at the source, like generate_feeder builds
+    names = np.array(["source"] + [f"load{count}" for count in range(num_loads)])
+    children = np.arange(1, num_loads + 1)
+    return np.column_stack([names[(children - 1) // BRANCHING], names[children]])
+
+
+def _phases(num_buses):
+    num_loads = num_buses - 1
+    connections = _connections(num_loads)
+    pv_loads = [f"load{count}" for count in range(0, num_loads, int(1 / PV_SHARE))]
+    circuit = None
+    feeder = None
+
+    def build_loads():
+        nonlocal circuit
+        circuit = PyGridSim(seed=SEED)
+        circuit.update_source()
+        circuit.add_load_nodes(num=num_loads)
+
+    def solve():
+        circuit.solve()
+
+    def build_feeder():
+        nonlocal feeder
+        feeder = generate_feeder({"house": num_loads}, branching=BRANCHING, seed=SEED)
+
+    def query(queries, as_arrays=False):
+        def run():
+            # drop the cached snapshot, so every query also pays for its engine fetch
+            circuit._snapshot = None
+            circuit.results(queries, as_arrays=as_arrays)
+        return run
+
+    phases = [
+        ("build", "add_load_nodes", build_loads),
+        ("build", "add_lines", lambda: circuit.add_lines(connections)),
+        ("build", "add_PVSystems", lambda: circuit.add_PVSystems(pv_loads)),
+        ("solve", "solve", solve),
+    ]
+    phases += [("results", name, query([name])) for name in QUERIES]
+    phases.append(("results", "Voltages (arrays)", query(["Voltages"], as_arrays=True)))
+    if num_buses <= FAULT_STUDY_MAX_BUSES:
+        phases += [
+            ("build", "generate_feeder", build_feeder),
+            ("solve", "fault_study", lambda: feeder.fault_study()),
+        ]
+    return phases
+
+
+def _max_rss():
+    # kilobytes on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def _run_size(num_buses, repeat):
+    seconds = {}
+    for _ in range(repeat):
+        for phase, case, function in _phases(num_buses):
+            start = time.perf_counter()
+            function()
+            elapsed = time.perf_counter() - start
+            seconds[phase, case] = min(seconds.get((phase, case), elapsed), elapsed)
+
+    peak_python = {}
+    tracemalloc.start()
+    for phase, case, function in _phases(num_buses):
+        tracemalloc.reset_peak()
+        held = tracemalloc.get_traced_memory()[0]
+        function()
+        # memory allocated on top of what earlier phases still hold
+        peak_python[phase, case] = tracemalloc.get_traced_memory()[1] - held
+    tracemalloc.stop()
+
+    max_rss = _max_rss()
+    return [{
+        "buses": num_buses,
+        "phase": phase,
+        "case": case,
+        "seconds": seconds[phase, case],
+        "peak_python_bytes": peak_python[phase, case],
+        "max_rss_bytes": max_rss,
+    } for phase, case in seconds]
+
+
+def _metadata():
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pygridsim": pygridsim.__version__,
+        "altdss": altdss.__version__,
+        "numpy": np.__version__,
+    }
+
+
+def _compare(results, baseline_path, threshold):
+    with open(baseline_path, encoding="utf-8") as baseline_file:
+        baseline = {(row["buses"], row["phase"], row["case"]): row
+                    for row in json.load(baseline_file)["results"]}
+
+    regressions = []
+    for row in results:
+        key = (row["buses"], row["phase"], row["case"])
+        if key not in baseline:
+            continue
+        before, after = baseline[key]["seconds"], row["seconds"]
+        if after > before * threshold and after - before > MIN_REGRESSION_SECONDS:
+            regressions.append((key, before, after))
+    for (buses, phase, case), before, after in regressions:
+        print(f"REGRESSION {phase}/{case} at {buses} buses: {before:.4f}s -> {after:.4f}s")
+    return regressions
+
+
+def main(sizes, repeat, output, compare, threshold):
+    results = []
+    context = multiprocessing.get_context("spawn")
+    print(f"{'buses':>8}  {'phase':<8}{'case':<20}{'time (s)':>10}{'python peak (MB)':>18}"
+          f"{'max rss (MB)':>14}")
+    for num_buses in sizes:
+        with context.Pool(1) as pool:
+            rows = pool.apply(_run_size, (num_buses, repeat))
+        for row in rows:
+            print(f"{row['buses']:>8}  {row['phase']:<8}{row['case']:<20}{row['seconds']:>10.4f}"
+                  f"{row['peak_python_bytes'] / 1e6:>18.2f}{row['max_rss_bytes'] / 1e6:>14.1f}")
+        results += rows
+
+    if output:
+        with open(output, "w", encoding="utf-8") as output_file:
+            json.dump({"metadata": _metadata(), "results": results}, output_file, indent=2)
+    if compare and _compare(results, compare, threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000, 100000],
+                        help="circuit sizes, in buses (the source and one bus per load)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="runs per size, the best wall time is kept")
+    parser.add_argument("--output", default="", help="path of the JSON results")
+    parser.add_argument("--compare", default="",
+                        help="JSON results of a baseline run to check for regressions")
+    parser.add_argument("--threshold", type=float, default=1.5,
+                        help="slowdown over the baseline reported as a regression")
+    args = parser.parse_args()
+    main(args.sizes, args.repeat, args.output, args.compare, args.threshold)
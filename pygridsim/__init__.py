@@ -6,6 +6,22 @@ __author__ = 'Angela Zhao'
 __email__ = 'amzhao@mit.edu'
 __version__ = '0.1.1.dev0'
 
+from pygridsim.aio import AsyncPyGridSim
+from pygridsim.cache import CircuitCache
 from pygridsim.core import PyGridSim
+from pygridsim.feeders import generate_feeder
+from pygridsim.instrumentation import Profiler
+from pygridsim.model import CircuitModel
+from pygridsim.names import NameRegistry
+from pygridsim.sampler import ParameterSampler
+from pygridsim.scenarios import run_hosting_capacity, run_scenarios, run_sweep
+from pygridsim.sharding import (
+    BrokerQueue, DirectoryQueue, ShardBroker, merge_shards, run_worker, submit_scenarios,
+    submit_sweep,)
 
-__all__ = ['PyGridSim']
+__all__ = [
+    'AsyncPyGridSim', 'BrokerQueue', 'CircuitCache', 'CircuitModel', 'DirectoryQueue',
+    'NameRegistry', 'PyGridSim', 'ParameterSampler', 'Profiler', 'ShardBroker',
+    'generate_feeder', 'merge_shards', 'run_hosting_capacity', 'run_scenarios', 'run_sweep',
+    'run_worker', 'submit_scenarios', 'submit_sweep',
+]
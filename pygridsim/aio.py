@@ -0,0 +1,245 @@
+"""
+Asyncio facade of PyGridSim, running every circuit's engine work in its own worker process
+"""
+import asyncio
+import inspect
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+from pygridsim.core import PyGridSim
+from pygridsim.sampler import ParameterSampler
+from pygridsim.sweeps import _make_axes
+
+# methods whose return value is plain data, sent back from the worker; the others return
+# engine objects that only live in the worker, and are awaited as None
+DATA_METHODS = {"results", "solve_timeseries", "sweep", "hosting_capacity", "fault_study",
+                "check_topology", "downstream", "get_types"}
+# methods that do not change the circuit (or restore it, like hosting_capacity), so they are
+# not replayed when rebuilding it
+QUERY_METHODS = {"results", "solve_timeseries", "hosting_capacity", "fault_study",
+                 "check_topology", "downstream", "get_types"}
+
+
+def _replay_calls(message):
+    # calls that bring a rebuilt circuit to the state a completed call left it in
+    method, args, kwargs = message
+    if method in QUERY_METHODS:
+        return []
+    if method != "sweep":
+        return [message]
+    # a sweep leaves the circuit solved at the last point of its grid, which is set directly
+    # instead of sweeping again
+    sweep = inspect.signature(PyGridSim.sweep).bind(None, *args, **kwargs)
+    sweep.apply_defaults()
+    axes = _make_axes(sweep.arguments["target"], sweep.arguments["param"],
+                      sweep.arguments["values"])
+    updates = [("_update_target", (target, {param: values[-1]}), {})
+               for target, param, values in axes]
+    return updates + [("solve", (), {})]
+
+
+def _call_circuit(circuit, method, args, kwargs):
+    if method == "build":
+        builder, = args
+        builder(circuit)
+        return None
+    result = getattr(circuit, method)(*args, **kwargs)
+    return result if method in DATA_METHODS else None
+
+
+def _serve(connection, seed):
+    # runs in the worker process: one circuit, one call at a time, until told to stop
+    circuit = PyGridSim(seed=seed)
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        try:
+            reply = (True, _call_circuit(circuit, *message))
+        except Exception as error:
+            reply = (False, error)
+        try:
+            connection.send(reply)
+        except Exception as error:
+            # e.g. engine errors that cannot be pickled
+            connection.send((False, RuntimeError(f"{type(error).__name__}: {error}")))
+    connection.close()
+
+
+class AsyncPyGridSim:
+    def __init__(self, seed=None):
+        """Initialize a circuit whose engine work runs in a dedicated worker process.
+
+        Every method is a coroutine that sends the call to the worker and awaits its reply,
+        so the event loop is never blocked by the engine, and many circuits can build and
+        solve concurrently (one process each). Calls on one circuit run one at a time, in
+        the order they are awaited.
+
+        Calls accept a timeout in seconds, and can be cancelled like any coroutine. A call
+        that times out or is cancelled while the engine runs stops the worker, and the next
+        call rebuilds the circuit in a new worker by replaying every completed call that
+        changed it, so the circuit is back to its state before the interrupted call. Sweeps
+        are replayed by setting their last point, and calls that leave the circuit as it was
+        (e.g. hosting_capacity, solve_timeseries) are not replayed. The timeout of a call
+        covers rebuilding the circuit.
+
+        Args:
+            seed (int | numpy.random.SeedSequence, optional):
+                Seed of the circuit, see PyGridSim. Defaults to None, which draws one seed
+                so that rebuilt circuits are identical.
+
+        Attributes:
+            seed (int | numpy.random.SeedSequence): Seed of the circuit.
+            history (list[tuple]): The (method, args, kwargs) calls replayed to rebuild the
+                circuit, from every completed call that changed it.
+        """
+        self.seed = ParameterSampler().seed_sequence.entropy if seed is None else seed
+        self.history = []
+        self._process = None
+        self._connection = None
+        self._reader = None
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _start_worker(self):
+        context = multiprocessing.get_context("spawn")
+        self._connection, worker_connection = context.Pipe()
+        self._process = context.Process(target=_serve, args=(worker_connection, self.seed),
+                                        daemon=True)
+        self._process.start()
+        worker_connection.close()
+        # waits on the worker's replies, so the event loop does not
+        self._reader = ThreadPoolExecutor(max_workers=1)
+
+    def _stop_worker(self):
+        if self._process is not None:
+            self._process.kill()
+            self._process.join()
+            self._connection.close()
+            # a pending read fails once the worker is gone, which ends the reader's thread
+            self._reader.shutdown(wait=False)
+        self._process = None
+        self._connection = None
+        self._reader = None
+
+    async def _send(self, message):
+        self._connection.send(message)
+        loop = asyncio.get_running_loop()
+        try:
+            success, result = await loop.run_in_executor(self._reader, self._connection.recv)
+        except (EOFError, OSError) as error:
+            # the worker died, e.g. from an engine crash; the next call rebuilds it
+            self._stop_worker()
+            raise RuntimeError("The circuit's worker process stopped unexpectedly") from error
+        if not success:
+            raise result
+        return result
+
+    async def _run(self, message):
+        if self._process is None:
+            self._start_worker()
+            for call in self.history:
+                await self._send(call)
+        return await self._send(message)
+
+    async def _call(self, method, args, kwargs, timeout):
+        async with self._lock:
+            message = (method, args, kwargs)
+            try:
+                # the timeout covers rebuilding the circuit too
+                result = await asyncio.wait_for(self._run(message), timeout)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                # the engine cannot be interrupted, so its worker is stopped instead
+                self._stop_worker()
+                raise
+            self.history += _replay_calls(message)
+            return result
+
+    async def call(self, method: str, *args, timeout: float = None, **kwargs):
+        """Calls any PyGridSim method on the circuit, e.g. "add_lines" or "sweep".
+
+        Args:
+            method (str):
+                Name of the PyGridSim method.
+            *args:
+                Positional arguments of the method.
+            timeout (float, optional):
+                Seconds to wait for the call. Defaults to None (no timeout).
+            **kwargs:
+                Keyword arguments of the method.
+
+        Returns:
+            The method's return value for methods returning plain data (e.g. results,
+            sweep, hosting_capacity), None for methods returning engine objects.
+        """
+        return await self._call(method, args, kwargs, timeout)
+
+    async def build(self, builder, timeout: float = None):
+        """Adds components to the circuit with a builder function.
+
+        Args:
+            builder (callable):
+                Function taking a PyGridSim and adding components to it.
+                Must be picklable (e.g. defined at module level).
+            timeout (float, optional):
+                Seconds to wait for the call. Defaults to None (no timeout).
+
+        Returns:
+            None
+        """
+        return await self._call("build", (builder,), {}, timeout)
+
+    async def solve(self, check_topology: bool = False, timeout: float = None):
+        """Solves the circuit, see PyGridSim.solve.
+
+        Args:
+            check_topology (bool, optional):
+                Whether to check that every node is connected to the source before solving.
+                Defaults to False.
+            timeout (float, optional):
+                Seconds to wait for the call. Defaults to None (no timeout).
+
+        Returns:
+            None
+        """
+        return await self._call("solve", (), {"check_topology": check_topology}, timeout)
+
+    async def results(self, queries: list[str], as_arrays: bool = False,
+                      timeout: float = None):
+        """Gets simulation results, see PyGridSim.results.
+
+        Args:
+            queries (list[str]):
+                A list of queries to the circuit.
+            as_arrays (bool, optional):
+                Whether to return per-bus results as aligned NumPy arrays. Defaults to False.
+            timeout (float, optional):
+                Seconds to wait for the call. Defaults to None (no timeout).
+
+        Returns:
+            dict:
+                A dictionary containing the fetched simulation results.
+        """
+        return await self._call("results", (queries,), {"as_arrays": as_arrays}, timeout)
+
+    async def close(self):
+        """Stops the worker process. The circuit can still be used, and is then rebuilt.
+
+        Returns:
+            None
+        """
+        async with self._lock:
+            if self._process is not None:
+                self._connection.send(None)
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(self._reader, self._process.join)
+                self._connection.close()
+                self._reader.shutdown()
+                self._process = None
+                self._connection = None
+                self._reader = None
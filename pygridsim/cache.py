@@ -0,0 +1,190 @@
+"""
+On-disk cache of compiled circuits, keyed by a hash of everything that determines the build
+"""
+import hashlib
+import json
+import os
+import tempfile
+from importlib.metadata import version
+
+import numpy as np
+
+import pygridsim
+import pygridsim.configs as configs
+import pygridsim.defaults as defaults
+from pygridsim.core import PyGridSim
+from pygridsim.spec import _read_spec
+
+DEFAULT_CACHE_BYTES = 1 << 30  # 1 GiB
+
+# bump when the layout of cache entries changes
+CACHE_FORMAT = 1
+
+
+def _module_constants(module):
+    return {name: repr(getattr(module, name)) for name in dir(module) if name.isupper()}
+
+
+def _seed_key(seed):
+    if isinstance(seed, np.random.SeedSequence):
+        return [repr(seed.entropy), list(seed.spawn_key)]
+    return repr(seed)
+
+
+class CircuitCache:
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_CACHE_BYTES):
+        """Initialize a cache of compiled circuits in a local directory.
+
+        Entries are keyed by a hash of the spec, the seed, the values in defaults.py and
+        configs.py, and the package and engine versions, so any change to the inputs of a
+        build misses the cache. Each entry stores the compiled OpenDSS script together with
+        the circuit's bookkeeping, and a hit restores the circuit with one engine call.
+        Least recently used entries are evicted once the directory grows past max_bytes.
+
+        Args:
+            directory (str):
+                Directory holding the entries. Created if it does not exist.
+            max_bytes (int, optional):
+                Size cap of the entries in the directory. Defaults to 1 GiB.
+
+        Attributes:
+            directory (str): Directory holding the entries.
+            max_bytes (int): Size cap of the entries in the directory.
+            hits (int): Number of builds served from the cache.
+            misses (int): Number of builds that compiled their spec.
+        """
+        if max_bytes <= 0:
+            raise ValueError("Cache size cap must be positive")
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, spec, seed):
+        """Computes the cache key of a build.
+
+        Args:
+            spec (dict | str):
+                The spec, or the path to a file holding it (see PyGridSim.load_spec).
+            seed (int | numpy.random.SeedSequence):
+                Seed of the circuit.
+
+        Returns:
+            str:
+                Hex digest identifying the build.
+        """
+        inputs = {
+            "format": CACHE_FORMAT,
+            "version": pygridsim.__version__,
+            "engine": version("altdss"),
+            "spec": _read_spec(spec),
+            "seed": _seed_key(seed),
+            "defaults": _module_constants(defaults),
+            "configs": _module_constants(configs),
+        }
+        encoded = json.dumps(inputs, sort_keys=True, default=repr).encode('utf-8')
+        return hashlib.sha256(encoded).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".json")
+
+    def build(self, spec, seed=None, dss=None):
+        """Builds a circuit from a spec, reusing the compiled circuit of an identical build.
+
+        Unseeded builds draw new parameters every time, so they are never cached.
+
+        Args:
+            spec (dict | str):
+                The spec, or the path to a file holding it (see PyGridSim.load_spec).
+            seed (int | numpy.random.SeedSequence, optional):
+                Seed of the circuit. Defaults to None (unseeded, not cached).
+            dss (AltDSS, optional):
+                Engine context to build the circuit in (see PyGridSim).
+
+        Returns:
+            PyGridSim:
+                The built circuit, with its sampler in the same state as after a fresh build.
+        """
+        circuit = PyGridSim(seed=seed, dss=dss)
+        if seed is None:
+            circuit.load_spec(spec)
+            return circuit
+
+        spec = _read_spec(spec)
+        path = self._path(self.key(spec, seed))
+        try:
+            with open(path, encoding='utf-8') as entry_file:
+                entry = json.load(entry_file)
+        except (OSError, ValueError):
+            entry = None
+
+        if entry is not None:
+            circuit._load_script(entry["script"], entry["build"])
+            circuit.sampler.rng.bit_generator.state = entry["sampler_state"]
+            os.utime(path)
+            self.hits += 1
+            return circuit
+
+        script, build = circuit._compile_spec(spec)
+        circuit._load_script(script, build)
+        self.misses += 1
+        self._store(path, {
+            "script": script,
+            "build": build,
+            "sampler_state": circuit.sampler.rng.bit_generator.state,
+        })
+        return circuit
+
+    def _store(self, path, entry):
+        # write to a temporary file first, so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding='utf-8') as entry_file:
+            json.dump(entry, entry_file)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    # evicted by another process sharing the directory
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name))
+        return entries
+
+    def _remove(self, name):
+        try:
+            os.remove(os.path.join(self.directory, name))
+        except FileNotFoundError:
+            pass
+
+    def size(self):
+        """Gets the total size of the cached entries.
+
+        Returns:
+            int:
+                Size of the entries in bytes.
+        """
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self):
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(name)
+            total -= size
+
+    def clear(self):
+        """Removes every cached entry.
+
+        Returns:
+            None
+        """
+        for _, _, name in self._entries():
+            self._remove(name)
@@ -19,6 +19,12 @@ LOAD_CONFIGURATIONS = {
     }
 }
 
+LOADSHAPE_CONFIGURATIONS = {
+    LoadType.HOUSE: defaults.HOUSE_LOADSHAPE,
+    LoadType.COMMERCIAL: defaults.COMMERCIAL_LOADSHAPE,
+    LoadType.INDUSTRIAL: defaults.INDUSTRIAL_LOADSHAPE
+}
+
 SOURCE_CONFIGURATIONS = {
     SourceType.TURBINE: {
         "kV": defaults.TURBINE_BASE_KV
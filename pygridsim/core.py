@@ -1,21 +1,62 @@
 # -*- coding: utf-8 -*-
-from altdss import altdss
+from collections import ChainMap
+
+import numpy as np
 
 from pygridsim.configs import NAME_TO_CONFIG
-from pygridsim.defaults import RESERVED_PREFIXES
-from pygridsim.lines import _make_line
-from pygridsim.parameters import _make_generator, _make_load_node, _make_pv, _make_source_node
-from pygridsim.results import _export_results, _query_solution
+from pygridsim.defaults import ENGINE_SOURCE_KV, ENGINE_SOURCE_PHASES
+from pygridsim.enums import LoadType
+from pygridsim.faults import FAULT_TYPES, _fault_study
+from pygridsim.hosting import _hosting_capacity
+from pygridsim.instrumentation import NullProfiler, Profiler, _profiled
+from pygridsim.lines import _compile_lines, _update_line, _update_transformer_kvs
+from pygridsim.model import FIELDS, CircuitModel, _find_batch, _read_component, _read_components
+from pygridsim.names import NameRegistry
+from pygridsim.parameters import (
+    NodeInfo, _get_enum_obj, _get_loadshapes, _index_nodes, _make_generators, _make_load_nodes,
+    _make_loadshape, _make_names, _make_pvs, _make_source_node, _run_script, _update_generator,
+    _update_load_node, _update_source_node,)
+from pygridsim.results import SolutionSnapshot, _export_results, _query_solution
+from pygridsim.sampler import ParameterSampler
+from pygridsim.spec import (
+    _check_spec, _compile_generators, _compile_loads, _compile_pvs, _compile_source, _read_spec,)
+from pygridsim.sweeps import DEFAULT_QUERIES, _grid_results, _grid_shape, _make_axes, _sweep_points
+from pygridsim.timeseries import _run_timeseries
+from pygridsim.topology import TopologyIndex
 
 """Main module."""
 
 
+def _new_context():
+    # altdss loads the native engine (and pandas) when imported, so it is only imported once
+    # a circuit needs the engine
+    from altdss import altdss
+    return altdss.NewContext()
+
+
 class PyGridSim:
-    def __init__(self):
+    def __init__(self, seed=None, dss=None, profiler=None):
         """Initialize OpenDSS engine.
 
         Instantiate an OpenDSS circuit that user can build circuit components on.
+        Each instance owns an isolated engine context, so several circuits can stay
+        resident in one process and be built, solved and queried concurrently from
+        different threads, one thread per circuit at a time.
         Stores numbers of circuit components to ensure unique naming of repeat circuit components.
+        The engine is loaded and the circuit created on first use, i.e. when the first
+        component is added or the circuit is solved, so calls such as get_types never load it.
+
+        Args:
+            seed (int | numpy.random.SeedSequence, optional):
+                Seed for the random parameters drawn from default ranges. Circuits built with
+                the same seed and the same calls are identical. Defaults to None (unseeded).
+            dss (AltDSS, optional):
+                Engine context to build the circuit in, e.g. to reuse one context for many
+                circuits in a worker. Its current circuit is cleared on first use.
+                Defaults to a new context owned by this instance.
+            profiler (Profiler | bool, optional):
+                Records wall time and call counts of this circuit's methods and helpers,
+                True for a new Profiler. Defaults to None (disabled, near-zero overhead).
 
         Attributes:
             num_loads (int): Number of loads in circuit so far.
@@ -23,24 +64,79 @@ class PyGridSim:
             num_transformers (int): Number of transformers in circuit so far.
             num_pv (int): Number of PV systems in circuit so far.
             num_generators (int): Number generators in circuit so far.
-            nickname_to_name (dict[str, str]): Map from nicknames to their internal names.
+            names (NameRegistry): Map from nicknames to their internal names, with
+                names.inverse mapping internal names back to nicknames.
+            nickname_to_name (NameRegistry): The same registry as names.
+            node_index (dict[str, NodeInfo]): Map from internal node names to their kind
+                ("source", "load" or "generator"), kV and phases, kept in sync with the engine.
+            topology (TopologyIndex): Graph of the circuit's nodes and lines.
+            model (CircuitModel): Records of every component (bus, kV, kW, kvar, length,
+                phases), kept in sync with the engine for inspection without engine calls.
+            sampler (ParameterSampler): Random stream used to draw default-range parameters.
+            dss (AltDSS): Engine context holding this circuit, started on first access.
+            profiler (Profiler | NullProfiler): Timings of this circuit, see Profiler.
         """
         self.num_generators = 0
         self.num_lines = 0
         self.num_loads = 0
         self.num_pv = 0
-        self.nickname_to_name = {}
-
-        altdss.ClearAll()
-        altdss('new circuit.MyCircuit')
-
-    def _check_naming(self, name):
-        if name in self.nickname_to_name:
-            raise ValueError("Provided name already assigned to a node")
-        if any(name.startswith(prefix) for prefix in RESERVED_PREFIXES):
-            raise ValueError(
-                "Cannot name nodes of the format 'component + __', ambiguity with internal names")
-
+        self.names = NameRegistry()
+        self.node_index = {}
+        self.topology = TopologyIndex()
+        self._snapshot = None
+        self._writers = {}
+        self._node_transformers = {}
+        self.sampler = ParameterSampler(seed)
+        if profiler is True:
+            profiler = Profiler()
+        self.profiler = profiler or NullProfiler()
+
+        self._dss = dss
+        self._engine_started = False
+        # every circuit starts with the engine's default source
+        self.node_index["source"] = NodeInfo("source", ENGINE_SOURCE_KV, ENGINE_SOURCE_PHASES)
+        self.topology.add_nodes(["source"])
+        self.model = CircuitModel(self.topology.names)
+        self.model.append("source", 1, bus1=self.topology.node_ids["source"],
+                          kV=ENGINE_SOURCE_KV, phases=ENGINE_SOURCE_PHASES)
+
+    @property
+    def dss(self):
+        if not self._engine_started:
+            self._start_engine()
+        return self._dss
+
+    def _start_engine(self):
+        with self.profiler.timer("_start_engine"):
+            if self._dss is None:
+                self._dss = _new_context()
+            self._dss.ClearAll()
+            self._dss('new circuit.MyCircuit')
+        self._engine_started = True
+
+    def _model_components(self, kind, start, stop, **columns):
+        # records new components from the engine, one bulk read per property
+        if stop > start:
+            with self.profiler.timer("_read_components"):
+                names = _make_names(kind, start, stop - start)
+                columns = {**_read_components(self.dss, kind, names), **columns}
+            self.model.append(kind, stop - start, **columns)
+
+    def _model_nodes(self, kind, start, stop):
+        # loads and generators sit on the bus of their own name
+        node_ids = self.topology.node_ids
+        buses = [node_ids[kind + str(count)] for count in range(start, stop)]
+        self._model_components(kind, start, stop, bus1=buses)
+
+    def _set_source(self, kv, phases):
+        self.node_index["source"] = NodeInfo("source", kv, phases)
+        self.model.update("source", 0, kV=kv, phases=phases)
+
+    @property
+    def nickname_to_name(self):
+        return self.names
+
+    @_profiled
     def add_load_nodes(self,
                        load_type: str = "house",
                        params: dict[str, int] = None,
@@ -63,8 +159,8 @@ class PyGridSim:
                 Up to num names to assign as shortcuts to the loads
 
         Returns:
-            list[OpenDSS object]:
-                A list of OpenDSS objects representing the load nodes created.
+            LoadBatch:
+                A batch of OpenDSS objects representing the load nodes created.
         """
 
         params = params or dict()
@@ -72,18 +168,22 @@ class PyGridSim:
         if len(names) > num:
             raise ValueError("Specified more names of loads than number of nodes")
 
-        load_nodes = []
-        for i in range(num):
-            if (len(names) > i):
-                self._check_naming(names[i])
-                internal_name = "load" + str(self.num_loads)
-                self.nickname_to_name[names[i]] = internal_name
+        # checked before the engine call, registered once the elements exist
+        self.names.validate(names)
 
-            _make_load_node(params, load_type, self.num_loads)
-            self.num_loads += 1
+        self._snapshot = None
+        with self.profiler.timer("_make_load_nodes"):
+            load_nodes = _make_load_nodes(self.dss, params, load_type, self.num_loads, num,
+                                          self.sampler)
+        self.names.register(names, "load", self.num_loads)
+        _index_nodes(self.node_index, "load", load_nodes)
+        self.topology.add_nodes(load_nodes.Name)
+        self._model_nodes("load", self.num_loads, self.num_loads + num)
+        self.num_loads += num
 
         return load_nodes
 
+    @_profiled
     def update_source(self, source_type: str = "turbine", params: dict[str, int] = None):
         """Adds or updates source node in system.
 
@@ -103,8 +203,14 @@ class PyGridSim:
                 The OpenDSS object representing the source node.
         """
         params = params or dict()
-        return _make_source_node(params, source_type)
-
+        self._snapshot = None
+        with self.profiler.timer("_make_source_node"):
+            source = _make_source_node(self.dss, params, source_type, self.sampler)
+        self._set_source(source.BasekV, source.Phases)
+        self._update_transformer_kvs("source", source.BasekV)
+        return source
+
+    @_profiled
     def add_PVSystems(self, load_nodes: list[str],
                       params: dict[str, int] = None, num_panels: int = 1):
         """Adds a photovoltaic (PV) system to the specified load nodes.
@@ -121,23 +227,25 @@ class PyGridSim:
                 The number of PV panels in the system. Defaults to 1.
 
         Returns:
-            list[DSS objects]:
-                A list of OpenDSS objects representing the PV systems created.
+            PVSystemBatch:
+                A batch of OpenDSS objects representing the PV systems created.
         """
         params = params or dict()
         if not load_nodes:
             raise ValueError("Need to enter load nodes to add PVSystem to")
 
-        PV_nodes = []
-        for load in load_nodes:
-            if (load in self.nickname_to_name):
-                load = self.nickname_to_name[load]
-
-            PV_nodes.append(_make_pv(load, params, num_panels, self.num_pv))
-            self.num_pv += 1
+        load_nodes = [self.nickname_to_name.get(load, load) for load in load_nodes]
+        self._snapshot = None
+        with self.profiler.timer("_make_pvs"):
+            PV_nodes = _make_pvs(self.dss, load_nodes, params, num_panels, self.num_pv,
+                                 self.sampler)
+        self._model_components("pv", self.num_pv, self.num_pv + len(load_nodes),
+                               bus1=self.topology.add_nodes(load_nodes))
+        self.num_pv += len(load_nodes)
 
         return PV_nodes
 
+    @_profiled
     def add_generators(self,
                        num: int = 1,
                        gen_type: str = "small",
@@ -156,28 +264,32 @@ class PyGridSim:
                 Up to num names to assign as shortcuts to the generators
 
         Returns:
-            list[DSS objects]:
-                A list of OpenDSS objects representing the generators created.
+            GeneratorBatch:
+                A batch of OpenDSS objects representing the generators created.
         """
         params = params or dict()
         names = names or list()
         if len(names) > num:
             raise ValueError("Specified more names of generators than number of nodes")
 
-        generators = []
-        for i in range(num):
-            if (len(names) > i):
-                self._check_naming(names[i])
-                internal_name = "generator" + str(self.num_generators)
-                self.nickname_to_name[names[i]] = internal_name
+        # checked before the engine call, registered once the elements exist
+        self.names.validate(names)
 
-            generators.append(_make_generator(params, gen_type, count=self.num_generators))
-            self.num_generators += 1
+        self._snapshot = None
+        with self.profiler.timer("_make_generators"):
+            generators = _make_generators(self.dss, params, gen_type, self.num_generators, num,
+                                          self.sampler)
+        self.names.register(names, "generator", self.num_generators)
+        _index_nodes(self.node_index, "generator", generators)
+        self.topology.add_nodes(generators.Name)
+        self._model_nodes("generator", self.num_generators, self.num_generators + num)
+        self.num_generators += num
 
         return generators
 
+    @_profiled
     def add_lines(self,
-                  connections: list[tuple],
+                  connections: list[tuple] | np.ndarray,
                   line_type: str = "lv",
                   params: dict[str, int] = None,
                   transformer: bool = True):
@@ -187,8 +299,9 @@ class PyGridSim:
         Users can specify the parameters of the lines or otherwise use given line type options.
 
         Args:
-            connections (list[tuple]):
-                A list of tuples defining the connections between nodes.
+            connections (list[tuple] | numpy.ndarray):
+                The (src, dst) pairs of nodes to connect, as a list of tuples or an array of
+                shape (lines, 2). All lines are created in a single engine call.
             line_type (str, optional):
                 The type of line (one of "lv", "mv", "hv"). Defaults to "lv".
             params (dict[str, int], optional):
@@ -200,64 +313,633 @@ class PyGridSim:
             None
         """
         params = params or dict()
-        for src, dst in connections:
-            if (src in self.nickname_to_name):
-                src = self.nickname_to_name[src]
-            if (dst in self.nickname_to_name):
-                dst = self.nickname_to_name[dst]
-            if (src == dst):
-                raise ValueError("Tried to make a line between equivalent src and dst")
-
-            _make_line(src, dst, line_type, self.num_lines, params, transformer)
-            self.num_lines += 1
-
-    def solve(self):
+        resolved = self._resolve_connections(connections)
+        # every endpoint is resolved while compiling, so a bad node leaves no partial lines
+        with self.profiler.timer("_compile_lines"):
+            commands = _compile_lines(resolved, line_type, self.num_lines, params, transformer,
+                                      self.sampler, self.node_index)
+        self._snapshot = None
+        with self.profiler.timer("_run_script"):
+            _run_script(self.dss, "\n".join(commands))
+        self._register_lines(resolved, self.num_lines, transformer)
+        self.num_lines += len(resolved)
+
+    def _resolve_connections(self, connections, nicknames=None):
+        nicknames = ChainMap(nicknames or {}, self.nickname_to_name)
+        if isinstance(connections, np.ndarray):
+            connections = connections.tolist()
+        resolved = [(nicknames.get(src, src), nicknames.get(dst, dst)) for src, dst in connections]
+        if any(src == dst for src, dst in resolved):
+            raise ValueError("Tried to make a line between equivalent src and dst")
+        return resolved
+
+    def _register_lines(self, connections, start, transformer):
+        self.topology.add_edges(connections)
+        if connections:
+            src, dst = zip(*connections)
+            self._model_components("line", start, start + len(connections),
+                                   bus1=self.topology.add_nodes(src),
+                                   bus2=self.topology.add_nodes(dst), transformer=transformer)
+        if not transformer:
+            return
+        for count, (src, dst) in enumerate(connections, start):
+            for winding, node in enumerate([src, dst]):
+                self._node_transformers.setdefault(node, []).append(
+                    ("transformer" + str(count), winding))
+
+    @_profiled
+    def load_spec(self, spec):
+        """Builds circuit components from a declarative spec in a single engine call.
+
+        The spec is compiled into one OpenDSS command script, which the engine parses at once
+        instead of receiving separate calls per component. Sections are compiled in the order
+        "source", "loads", "generators", "pv", "lines", and each entry takes the arguments of
+        the matching method, so a spec builds the same circuit (for the same seed) as calling
+        update_source, add_load_nodes, add_generators, add_PVSystems and add_lines in order.
+        Nothing is added to the circuit if any entry is invalid.
+
+        Example:
+            {"source": {"source_type": "turbine", "params": {"kV": 10}},
+             "loads": [{"load_type": "house", "num": 2, "names": ["home"]}],
+             "generators": [{"gen_type": "small", "num": 1}],
+             "pv": [{"load_nodes": ["home"], "num_panels": 2}],
+             "lines": [{"connections": [["source", "home"], ["home", "load1"]],
+                        "line_type": "lv", "transformer": True}]}
+
+        Args:
+            spec (dict | str):
+                The spec, or the path to a ".json" or ".yaml"/".yml" (needs pyyaml) file
+                holding it.
+
+        Returns:
+            None
+        """
+        with self.profiler.timer("_compile_spec"):
+            commands, build = self._compile_spec(_read_spec(spec))
+        self._load_script(commands, build)
+
+    def _compile_spec(self, spec):
+        # compiles a spec without touching the circuit, returning the script and the
+        # bookkeeping to apply once the script has run
+        _check_spec(spec)
+        num_loads, num_generators = self.num_loads, self.num_generators
+        num_pv, num_lines = self.num_pv, self.num_lines
+        nicknames = {}
+        nodes = {}
+        loadshapes = set()
+        lines = []
+        commands = []
+
+        def resolve(name):
+            return nicknames.get(name, self.nickname_to_name.get(name, name))
+
+        def add_nicknames(names, num, prefix, start):
+            if len(names) > num:
+                raise ValueError(f"Specified more names of {prefix}s than number of nodes")
+            self.names.validate(names, taken=nicknames.keys())
+            nicknames.update((name, prefix + str(start + i)) for i, name in enumerate(names))
+
+        if "source" in spec:
+            entry = spec["source"]
+            source_commands, nodes["source"] = _compile_source(
+                entry.get("params") or dict(), entry.get("source_type", "turbine"), self.sampler)
+            commands += source_commands
+
+        for entry in spec.get("loads", []):
+            num = entry.get("num", 1)
+            add_nicknames(entry.get("names") or list(), num, "load", num_loads)
+            load_commands, load_nodes = _compile_loads(
+                self.dss, entry.get("params") or dict(), entry.get("load_type", "house"),
+                num_loads, num, self.sampler, loadshapes)
+            commands += load_commands
+            nodes.update(load_nodes)
+            num_loads += num
+
+        for entry in spec.get("generators", []):
+            num = entry.get("num", 1)
+            add_nicknames(entry.get("names") or list(), num, "generator", num_generators)
+            generator_commands, generator_nodes = _compile_generators(
+                entry.get("params") or dict(), entry.get("gen_type", "small"), num_generators,
+                num, self.sampler)
+            commands += generator_commands
+            nodes.update(generator_nodes)
+            num_generators += num
+
+        for entry in spec.get("pv", []):
+            load_nodes = [resolve(load) for load in entry.get("load_nodes") or list()]
+            if not load_nodes:
+                raise ValueError("Need to enter load nodes to add PVSystem to")
+            commands += _compile_pvs(load_nodes, entry.get("params") or dict(),
+                                     entry.get("num_panels", 1), num_pv, self.sampler)
+            num_pv += len(load_nodes)
+
+        for entry in spec.get("lines", []):
+            connections = self._resolve_connections(entry["connections"], nicknames)
+            transformer = entry.get("transformer", True)
+            commands += _compile_lines(connections, entry.get("line_type", "lv"), num_lines,
+                                       entry.get("params") or dict(), transformer, self.sampler,
+                                       ChainMap(nodes, self.node_index))
+            lines.append((connections, num_lines, transformer))
+            num_lines += len(connections)
+
+        build = {
+            "num_loads": num_loads,
+            "num_generators": num_generators,
+            "num_pv": num_pv,
+            "num_lines": num_lines,
+            "nicknames": nicknames,
+            "nodes": nodes,
+            "lines": lines,
+        }
+        return "\n".join(commands), build
+
+    def _load_script(self, script, build):
+        with self.profiler.timer("_run_script"):
+            _run_script(self.dss, script)
+
+        # transformers in the script already use the new source kV, only earlier ones follow
+        if "source" in build["nodes"]:
+            self._update_transformer_kvs("source", build["nodes"]["source"][1])
+        self.node_index.update((name, NodeInfo(*node)) for name, node in build["nodes"].items())
+        if "source" in build["nodes"]:
+            self._set_source(*build["nodes"]["source"][1:])
+        self.topology.add_nodes(list(build["nodes"]))
+        self.names.register_names(build["nicknames"])
+        self._model_nodes("load", self.num_loads, build["num_loads"])
+        self._model_nodes("generator", self.num_generators, build["num_generators"])
+        if build["num_pv"] > self.num_pv:
+            # the script holds the buses of PV systems, read them back with the other fields
+            pvs = _find_batch(self.dss.PVSystem,
+                              _make_names("pv", self.num_pv, build["num_pv"] - self.num_pv))
+            buses = [bus.split(".")[0] for bus in pvs.Bus1]
+            self._model_components("pv", self.num_pv, build["num_pv"],
+                                   bus1=self.topology.add_nodes(buses))
+        for connections, start, transformer in build["lines"]:
+            self._register_lines(connections, start, transformer)
+        self.num_loads, self.num_generators = build["num_loads"], build["num_generators"]
+        self.num_pv, self.num_lines = build["num_pv"], build["num_lines"]
+        self._snapshot = None
+
+    def _update_transformer_kvs(self, node, kv):
+        # keep the windings of transformers attached to a node at the node's kV
+        _update_transformer_kvs(self.dss, self._node_transformers.get(node, []), kv)
+
+    def _update_model(self, kind, name, params):
+        # the engine derives some fields from others (e.g. kvar from kW at a fixed power
+        # factor), so the updated element is read back instead of copying params
+        if any(field in FIELDS for field in params):
+            with self.profiler.timer("_read_components"):
+                columns = _read_component(self.dss, kind, name)
+            self.model.update(kind, int(name[len(kind):]), **columns)
+
+    def _update_node(self, name, params):
+        node = self.node_index[name]
+        self.node_index[name] = node._replace(kV=params.get("kV", node.kV),
+                                              phases=params.get("phases", node.phases))
+        if "kV" in params:
+            self._update_transformer_kvs(name, params["kV"])
+
+    @_profiled
+    def update_load(self, name: str, params: dict[str, int]):
+        """Updates parameters of an existing load in place.
+
+        Mutates the load in the engine instead of rebuilding the circuit, so the next solve()
+        starts from the previous solution. Transformers attached to the load follow its kV.
+
+        Args:
+            name (str):
+                Internal name (e.g. "load0") or nickname of the load.
+            params (dict[str, int]):
+                Load parameters to change, any of "kV", "kW", "kvar", "phases".
+
+        Returns:
+            OpenDSS object:
+                The OpenDSS object representing the load.
+        """
+        name = self.nickname_to_name.get(name, name)
+        self._snapshot = None
+        load = _update_load_node(self.dss, name, params)
+        self._update_node(name, params)
+        self._update_model("load", name, params)
+        return load
+
+    @_profiled
+    def update_generator(self, name: str, params: dict[str, int]):
+        """Updates parameters of an existing generator in place.
+
+        Mutates the generator in the engine instead of rebuilding the circuit, so the next
+        solve() starts from the previous solution. Transformers attached to the generator
+        follow its kV.
+
+        Args:
+            name (str):
+                Internal name (e.g. "generator0") or nickname of the generator.
+            params (dict[str, int]):
+                Generator parameters to change, any of "kV", "kW", "phases".
+
+        Returns:
+            OpenDSS object:
+                The OpenDSS object representing the generator.
+        """
+        name = self.nickname_to_name.get(name, name)
+        self._snapshot = None
+        generator = _update_generator(self.dss, name, params)
+        self._update_node(name, params)
+        self._update_model("generator", name, params)
+        return generator
+
+    @_profiled
+    def update_line(self, name: str, params: dict[str, int]):
+        """Updates parameters of an existing line (and its transformer) in place.
+
+        Mutates the line in the engine instead of rebuilding the circuit, so the next solve()
+        starts from the previous solution.
+
+        Args:
+            name (str):
+                Internal name of the line, e.g. "line0" for the first line added.
+            params (dict[str, int]):
+                Line parameters to change, any of "length" or the transformer's "XHL".
+
+        Returns:
+            OpenDSS object:
+                The OpenDSS object representing the line.
+        """
+        self._snapshot = None
+        line = _update_line(self.dss, name, params)
+        self._update_model("line", name, params)
+        return line
+
+    def _update_target(self, target, params):
+        # updates any element by name, as sweeps do
+        name = self.nickname_to_name.get(target, target)
+        if name == "source":
+            self._snapshot = None
+            with self.profiler.timer("_update_source_node"):
+                source = _update_source_node(self.dss, params)
+            self._set_source(source.BasekV, source.Phases)
+            if "kV" in params:
+                self._update_transformer_kvs("source", params["kV"])
+            return source
+        if name in self.node_index:
+            if self.node_index[name].kind == "load":
+                return self.update_load(name, params)
+            return self.update_generator(name, params)
+        return self.update_line(name, params)
+
+    @_profiled
+    def sweep(self,
+              target: str | list[tuple],
+              param: str = None,
+              values: list = None,
+              queries: list[str] = None):
+        """Sweeps parameters of this circuit over a grid of values.
+
+        The circuit is built once: for every point of the grid, the swept elements are
+        updated in place (see update_load) and the circuit is re-solved, starting from the
+        previous solution. Results are collected into arrays preallocated for the whole grid.
+        The circuit is left at the last point of the grid. To split a grid across worker
+        processes, see run_sweep.
+
+        Args:
+            target (str | list[tuple]):
+                Element to sweep ("source", or the internal name or nickname of a load,
+                generator or line), or a list of (target, param, values) axes to sweep
+                every combination of.
+            param (str, optional):
+                Parameter of the element to sweep, e.g. "kW" or "length".
+                Defaults to None (target lists the axes).
+            values (list, optional):
+                Values of the parameter. Defaults to None (target lists the axes).
+            queries (list[str], optional):
+                Queries collected at every point, as in results(as_arrays=True).
+                Defaults to ["Voltages", "Losses"].
+
+        Returns:
+            dict:
+                "Grid" as a list of (target, param, values) axes, and every query with its
+                values stacked into arrays of shape (points of axis 1, ..., points of axis n)
+                followed by the query's own shape, e.g. (..., buses) for "Voltages" values.
+        """
+        axes = _make_axes(target, param, values)
+        points = range(int(np.prod(_grid_shape(axes))))
+        parts = [_sweep_points(self, axes, points, queries or DEFAULT_QUERIES)]
+        return _grid_results(axes, parts)
+
+    @_profiled
+    def hosting_capacity(self,
+                         buses: list[str] = None,
+                         v_min: float = 0.95,
+                         v_max: float = 1.05,
+                         loss_limit: float = None,
+                         max_kw: float = 1000,
+                         tolerance: float = 1):
+        """Finds how much PV every candidate load bus can host within voltage and loss limits.
+
+        A probe PV system is moved from bus to bus, and its size is bisected between 0 and
+        max_kw, editing the probe and re-solving the circuit in place at every step, so the
+        circuit is built once for all buses. To split the buses across worker processes,
+        see run_hosting_capacity.
+
+        Args:
+            buses (list[str], optional):
+                Internal names or nicknames of the candidate load buses.
+                Defaults to every load bus.
+            v_min (float, optional):
+                Lowest allowed voltage of any bus node, per unit of its nominal line to neutral
+                voltage. Defaults to 0.95.
+            v_max (float, optional):
+                Highest allowed voltage of any bus node, per unit of its nominal line to neutral
+                voltage. Defaults to 1.05.
+            loss_limit (float, optional):
+                Highest allowed active power loss, as a multiple of the losses without PV
+                (e.g. 1 for PV that must not increase losses). Defaults to None (no limit).
+            max_kw (float, optional):
+                Largest PV size tried at a bus. Defaults to 1000.
+            tolerance (float, optional):
+                The bisection stops once the capacity is known within tolerance kW.
+                Defaults to 1.
+
+        Returns:
+            dict:
+                "names" and "nicknames" ("" if none) of the buses as str arrays, and "values",
+                the PV capacity of every bus in kW as a float64 array (0 if the circuit violates
+                the voltage limits without PV, max_kw if no size up to max_kw violates them).
+        """
+        if buses is None:
+            buses = [name for name, info in self.node_index.items() if info.kind == "load"]
+        buses = [self.nickname_to_name.get(bus, bus) for bus in buses]
+        for bus in buses:
+            if bus not in self.node_index or self.node_index[bus].kind != "load":
+                raise KeyError(f"Invalid load bus {bus}")
+        if not 0 < v_min < v_max:
+            raise ValueError("Voltage limits need 0 < v_min < v_max")
+        if max_kw <= 0 or tolerance <= 0:
+            raise ValueError("max_kw and tolerance must be positive")
+
+        with self.profiler.timer("_hosting_capacity"):
+            capacity = _hosting_capacity(self.dss, self.node_index, buses, v_min, v_max,
+                                         loss_limit, max_kw, tolerance)
+        self._snapshot = SolutionSnapshot(self.dss)
+
+        return {
+            "names": np.asarray(buses, dtype=np.str_),
+            "nicknames": self.names.nicknames(buses),
+            "values": capacity,
+        }
+
+    @_profiled
+    def fault_study(self, faults: list[str] = None, fault_resistance: float = 0):
+        """Computes the short-circuit current of every bus for bolted faults to ground.
+
+        The engine's fault study solution finds the open-circuit voltages and short-circuit
+        impedance matrices of all buses in one pass, and the fault currents of every bus are
+        derived from them in vectorized NumPy, instead of placing and solving one fault at a
+        time. The engine has no bulk read of these, so reading them costs two engine calls
+        per bus, and its fault study solution itself grows faster than the number of buses:
+        see the fault study cases of benchmarks/suite.py for timings on large feeders. The
+        circuit is left solved in snapshot mode.
+
+        Args:
+            faults (list[str], optional):
+                Faults to study: "3PH" (all phases of the bus to ground) and/or "SLG" (single
+                line to ground, at the phase with the largest current). Defaults to both.
+            fault_resistance (float, optional):
+                Resistance of the fault in ohms. Defaults to 0 (bolted faults).
+
+        Returns:
+            dict:
+                "names" and "nicknames" of every bus, and for every fault the largest
+                phase current of every bus in A, as arrays aligned by bus.
+        """
+        faults = [fault.upper() for fault in (faults or FAULT_TYPES)]
+        for fault in faults:
+            if fault not in FAULT_TYPES:
+                raise ValueError(f"Invalid fault type {fault}: expect one of {FAULT_TYPES}")
+        if fault_resistance < 0:
+            raise ValueError("Fault resistance cannot be negative")
+
+        with self.profiler.timer("_fault_study"):
+            bus_names, currents = _fault_study(self.dss, faults, fault_resistance)
+        self._snapshot = SolutionSnapshot(self.dss)
+
+        results = {
+            "names": np.asarray(bus_names, dtype=np.str_),
+            "nicknames": self.names.nicknames(bus_names),
+        }
+        results.update(currents)
+        return results
+
+    def check_topology(self):
+        """Checks how the circuit's nodes are connected, without calling the engine.
+
+        Returns:
+            dict:
+                "unreachable" (list[str]): nodes no line path connects to the source,
+                "islands" (list[list[str]]): the unreachable nodes grouped by connectivity,
+                "cycles" (int): number of independent cycles (meshes) formed by lines,
+                "radial" (bool): whether all nodes form a single tree.
+        """
+        return {
+            "unreachable": self.topology.unreachable(),
+            "islands": self.topology.islands(),
+            "cycles": self.topology.num_cycles(),
+            "radial": self.topology.is_radial(),
+        }
+
+    def downstream(self, name: str):
+        """Lists the nodes fed through a node, seen from the source.
+
+        Answered from the topology index, without calling the engine.
+
+        Args:
+            name (str):
+                Internal name or nickname of the node.
+
+        Returns:
+            list[str]:
+                Internal names of the downstream nodes, nearest first.
+        """
+        return self.topology.downstream(self.nickname_to_name.get(name, name))
+
+    @_profiled
+    def solve(self, check_topology: bool = False):
         """Solves the OpenDSS circuit.
 
         Initializes "solve" mode in OpenDSS, which allows user to query results on the circuit.
+        Results of earlier solves are discarded.
+
+        Args:
+            check_topology (bool, optional):
+                Whether to check that every node is connected to the source before solving,
+                raising a ValueError otherwise. Defaults to False.
 
         Returns:
             None
         """
-        altdss.Solution.Solve()
+        if check_topology:
+            unreachable = self.topology.unreachable()
+            if unreachable:
+                raise ValueError(f"Nodes not connected to the source: {unreachable}")
+        with self.profiler.timer("Solution.Solve"):
+            self.dss.Solution.Solve()
+        self._snapshot = SolutionSnapshot(self.dss)
+
+    def set_loadshape(self,
+                      load_type: str,
+                      mult: list[float],
+                      interval: float = 1,
+                      yearly: bool = False):
+        """Sets the load shape followed by all loads of a type in time-series simulations.
+
+        Every load type starts with a default daily curve (see defaults.py), which is also
+        repeated for every day of yearly simulations until a yearly shape is set.
+
+        Args:
+            load_type (str):
+                Load type as a string, one of "house", "commercial", "industrial".
+            mult (list[float]):
+                Multipliers of the loads' kW, one per interval.
+            interval (float, optional):
+                Hours between two multipliers. Defaults to 1.
+            yearly (bool, optional):
+                Whether to set the shape of yearly simulations instead of daily ones.
+                Defaults to False.
+
+        Returns:
+            LoadShape:
+                The OpenDSS object representing the load shape.
+        """
+        if len(mult) == 0 or any(value < 0 for value in mult):
+            raise ValueError("Load shape needs at least one multiplier, none negative")
+        daily, yearly_name = _get_loadshapes(self.dss, _get_enum_obj(LoadType, load_type))
+        return _make_loadshape(self.dss, yearly_name if yearly else daily, mult, interval)
+
+    @_profiled
+    def solve_timeseries(self, mode: str = "daily", steps: int = None, step_hours: float = 1):
+        """Runs a quasi-static time-series simulation of the circuit.
+
+        Loads follow the daily or yearly load shape of their type (see set_loadshape).
+        The engine runs all steps in its own loop, and voltages and losses of every step
+        are collected into preallocated arrays. Monitors store single precision values.
+
+        Args:
+            mode (str, optional):
+                One of "daily" or "yearly". Defaults to "daily".
+            steps (int, optional):
+                Number of steps to run. Defaults to a full period (24 for daily, 8760 for yearly).
+            step_hours (float, optional):
+                Length of a step in hours. Defaults to 1.
+
+        Returns:
+            dict:
+                "Hours" (array of shape (steps,)) with the time of every step,
+                "Voltages" as {"names", "nicknames", "values"} with values of shape
+                (steps, buses), and "Losses" as {"Active Power Loss", "Reactive Power Loss"}
+                arrays of shape (steps,).
+        """
+        with self.profiler.timer("_run_timeseries"):
+            hours, bus_names, voltages, losses = _run_timeseries(self.dss, mode, steps,
+                                                                 step_hours)
+        self._snapshot = None
+
+        return {
+            "Hours": hours,
+            "Voltages": {
+                "names": np.asarray(bus_names, dtype=np.str_),
+                "nicknames": self.names.nicknames(bus_names),
+                "values": voltages,
+            },
+            "Losses": {
+                "Active Power Loss": losses[:, 0],
+                "Reactive Power Loss": losses[:, 1],
+            },
+        }
 
     def _get_name_to_nickname(self):
-        return {v: k for k, v in self.nickname_to_name.items()}
+        return self.names.inverse
 
-    def results(self, queries: list[str], export_path=""):
+    @_profiled
+    def results(self, queries: list[str], export_path="", as_arrays: bool = False):
         """Gets simulation results based on specified queries.
 
         Allows the user to query for many results at once by providing a list of desired queries.
+        Engine quantities of the last solve are cached, until the circuit is solved again or
+        edited.
 
         Args:
             queries (list[str]):
                 A list of queries to the circuit: one of ("Voltages", "Losses", "TotalPower")
                 or partial queries ("RealLoss", "ReactiveLoss", "RealPower", "ReactivePower")
-                that query one component of Losses/TotalPower
+                that query one component of Losses/TotalPower, or per-element queries
+                ("LineCurrents", "LinePowers", "LoadPowers", "GeneratorOutput",
+                "TransformerLoading"), which are always returned as aligned arrays
+                {"names", "nicknames", ...}: "values" holds the largest conductor current of
+                every line in A, or the loading of every transformer in percent of its kVA,
+                and "Active Power"/"Reactive Power" hold the kW/kvar of every element
+                (at the sending end of lines, delivered by generators)
             export_path (str, optional):
                 The file path to export results. If empty, results are not exported.
+                The format follows the file extension: ".json" (and any other extension)
+                replaces the file on every call, while ".jsonl", ".npz", ".h5"/".hdf5" (needs
+                h5py) and ".parquet"/".arrow" (needs pyarrow) append one run per call, so many
+                solves stream to one file. Parquet and Arrow files are complete once
+                close_exports() is called or the circuit is garbage collected, and are never
+                appended to once closed: exporting to an existing one raises FileExistsError.
                 Defaults to "".
+            as_arrays (bool, optional):
+                Whether to return per-bus results as aligned NumPy arrays instead of a dict,
+                i.e. "Voltages" as {"names": str array, "nicknames": str array ("" if none),
+                "values": float64 array}, holding like the dict the average magnitude of the
+                nodes of every bus.
+                Arrays are read-only views of the solution, copy them before modifying.
+                Defaults to False.
 
         Returns:
             dict:
                 A dictionary containing the fetched simulation results.
         """
+        if self._snapshot is None:
+            self._snapshot = SolutionSnapshot(self.dss)
+
+        name_to_nickname = self._get_name_to_nickname()
         results = {}
         for query in queries:
-            results[query] = _query_solution(query, self._get_name_to_nickname())
+            with self.profiler.timer("_query_solution"):
+                results[query] = _query_solution(self._snapshot, query, name_to_nickname,
+                                                 as_arrays)
 
         if (export_path):
-            _export_results(results, export_path)
+            with self.profiler.timer("_export_results"):
+                _export_results(results, export_path, self._writers)
 
         return results
 
+    def close_exports(self):
+        """Closes all files opened by results() exports.
+
+        Streamed formats (Parquet, Arrow) are only readable after this call, or once the
+        circuit is garbage collected. They cannot be exported to again afterwards.
+
+        Returns:
+            None
+        """
+        for writer in self._writers.values():
+            writer.close()
+        self._writers = {}
+
     def clear(self):
         """Clears the OpenDSS circuit.
 
+        Also closes any open result exports.
+
         Returns:
             None
         """
-        altdss.ClearAll()
+        self.close_exports()
+        if self._engine_started:
+            self.dss.ClearAll()
+        self._snapshot = None
 
     def get_types(self, component: str, show_ranges: bool = False):
         """Provides list of all supported Load Types
@@ -1,7 +1,7 @@
 """
 Set any defaults (i.e. default source voltage, default node load etc.)
+Plain values only, so importing them does not load the engine.
 """
-from altdss import Connection
 
 """
 Overall Defaults, used for load, sources, lines, etc.
@@ -27,10 +27,26 @@ INDUSTRIAL_KV = [4.16, 34.5]
 INDUSTRIAL_KW = [200, 10000]
 INDUSTRIAL_KVAR = [150, 480]
 
+"""
+Load Shapes
+Hourly multipliers of kW over a day, used by daily and yearly time-series simulations.
+Houses peak in the evening, commercial loads during business hours, industry is flatter.
+"""
+LOADSHAPE_INTERVAL = 1  # hours
+HOUSE_LOADSHAPE = [0.35, 0.3, 0.28, 0.27, 0.28, 0.35, 0.5, 0.6, 0.55, 0.5, 0.48, 0.47,
+                   0.48, 0.5, 0.55, 0.62, 0.75, 0.9, 1, 0.98, 0.9, 0.75, 0.6, 0.45]
+COMMERCIAL_LOADSHAPE = [0.3, 0.28, 0.27, 0.27, 0.28, 0.32, 0.45, 0.65, 0.85, 0.95, 1, 1,
+                        0.98, 1, 0.98, 0.95, 0.9, 0.8, 0.6, 0.45, 0.4, 0.35, 0.33, 0.3]
+INDUSTRIAL_LOADSHAPE = [0.7, 0.68, 0.67, 0.67, 0.68, 0.72, 0.85, 0.95, 1, 1, 1, 0.98,
+                        0.95, 0.98, 1, 1, 0.98, 0.92, 0.85, 0.8, 0.77, 0.75, 0.73, 0.71]
+
 """
 Source Nodes (including other form of sources, like PVSystem)
 """
 IMPEDANCE = 0.0001
+# the engine's default source, which every new circuit starts with
+ENGINE_SOURCE_KV = 115
+ENGINE_SOURCE_PHASES = 3
 TURBINE_BASE_KV = [1, 3]
 POWER_PLANT_KV = [10, 20]
 LV_SUBSTATION_BASE_KV = [0.2, 0.4]
@@ -53,6 +69,7 @@ INDUSTRIAL_GEN_KW = [10, 20]
 Units: KM
 LV = Low Voltage, MV = Medium Voltage
 """
+LINE_UNITS = "km"
 LV_LINE_LENGTH = [30, 60]
 MV_LINE_LENGTH = [60, 160]
 HV_LINE_LENGTH = [160, 300]
@@ -62,8 +79,13 @@ Transformers
 """
 NUM_WINDINGS = 2
 XHL = 2
-PRIMARY_CONN = Connection.delta
-SECONDARY_CONN = Connection.wye
+PRIMARY_CONN = "delta"
+SECONDARY_CONN = "wye"
+
+"""
+Time-series simulations
+"""
+TIMESERIES_STEPS = {"daily": 24, "yearly": 8760}
 
 """
 Valid parameter lists
@@ -77,3 +99,6 @@ VALID_PV_PARAMS = ["kV", "phases"]
 VALID_GENERATOR_PARAMS = ["kV", "kW", "phases"]
 
 RESERVED_PREFIXES = ["load", "generator", "pv", "source"]
+
+# engine property names of parameters, where they differ
+PARAM_PROPERTIES = {"phases": "Phases", "length": "Length", "frequency": "Frequency"}
@@ -0,0 +1,60 @@
+"""
+Fault study: short-circuit currents of every bus from one fault study solution of the engine
+"""
+import numpy as np
+
+# bolted fault of all phases of a bus to ground, and of its worst single phase to ground
+FAULT_TYPES = ["3PH", "SLG"]
+
+
+def _read_buses(dss):
+    # open-circuit voltages and short-circuit impedance matrices of every bus, as computed
+    # by the fault study solution, grouped by number of nodes. The engine only reads them bus
+    # by bus, so this costs two engine calls per bus; the nodes are counted from the voltages
+    # instead of a third call.
+    groups = {}
+    for index in range(dss.NumBuses):
+        bus = dss.Bus[index]
+        bus_voc = bus.VOC
+        num_nodes = len(bus_voc)
+        voc, zsc, indices = groups.setdefault(num_nodes, ([], [], []))
+        voc.append(bus_voc)
+        zsc.append(np.reshape(bus.ZSC, (num_nodes, num_nodes)))
+        indices.append(index)
+    return groups
+
+
+def _fault_currents(voc, zsc, fault, fault_resistance):
+    # voc of shape (buses, nodes), zsc of shape (buses, nodes, nodes); largest phase current
+    # of every bus in A
+    if fault == "3PH":
+        zsc = zsc + fault_resistance * np.eye(zsc.shape[-1])
+        currents = np.linalg.solve(zsc, voc[..., np.newaxis])[..., 0]
+    else:
+        # other phases stay open, so each node only sees its own Thevenin impedance
+        currents = voc / (np.diagonal(zsc, axis1=1, axis2=2) + fault_resistance)
+    return np.abs(currents).max(axis=1)
+
+
+def _fault_study(dss, faults, fault_resistance):
+    # the engine is already loaded once a circuit is solved
+    from dss.enums import SolveModes
+
+    solution = dss.Solution
+    # the fault study starts from a converged snapshot solution
+    solution.Solve()
+    solution.Mode = SolveModes.FaultStudy
+    try:
+        solution.Solve()
+        groups = _read_buses(dss)
+    finally:
+        solution.Mode = SolveModes.SnapShot
+        # leave the circuit solved as before the study
+        solution.Solve()
+
+    currents = {fault: np.empty(dss.NumBuses) for fault in faults}
+    for voc, zsc, indices in groups.values():
+        voc, zsc = np.asarray(voc), np.asarray(zsc)
+        for fault in faults:
+            currents[fault][indices] = _fault_currents(voc, zsc, fault, fault_resistance)
+    return dss.BusNames(), currents
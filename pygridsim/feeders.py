@@ -0,0 +1,93 @@
+"""
+Procedural generator of synthetic feeders, for building large circuits at scale
+"""
+import numpy as np
+
+from pygridsim.core import PyGridSim
+from pygridsim.enums import LineType, LoadType
+from pygridsim.parameters import _get_enum_obj
+
+
+def _feeder_edges(num_nodes, branching, mesh, rng):
+    # node 0 is the source; node i hangs off (i - 1) // branching, a complete tree
+    children = np.arange(1, num_nodes)
+    edges = np.column_stack([(children - 1) // branching, children])
+
+    num_extra = int(round(mesh * len(edges)))
+    if num_extra and num_nodes > 2:
+        src = rng.integers(0, num_nodes, num_extra)
+        # a nonzero offset never links a node to itself
+        dst = (src + rng.integers(1, num_nodes, num_extra)) % num_nodes
+        edges = np.concatenate([edges, np.column_stack([src, dst])])
+    return edges
+
+
+def generate_feeder(loads: dict[str, int],
+                    branching: int = 3,
+                    line_types: dict[str, float] = None,
+                    mesh: float = 0.0,
+                    source_type: str = "turbine",
+                    seed=None,
+                    dss=None):
+    """Generates a synthetic radial or weakly-meshed feeder.
+
+    The topology is a complete tree rooted at the source with branching children per node,
+    with the loads of all types shuffled over its positions. The whole topology and the line
+    types are drawn as arrays in one vectorized pass, then built with one add_load_nodes call
+    per load type and one add_lines call per line type.
+
+    Args:
+        loads (dict[str, int]):
+            Number of loads of each load type, e.g. {"house": 9000, "commercial": 900}.
+        branching (int, optional):
+            Number of children of every node of the tree. Defaults to 3.
+        line_types (dict[str, float], optional):
+            Share of lines of each line type, e.g. {"lv": 0.8, "mv": 0.2}.
+            Defaults to only "lv" lines.
+        mesh (float, optional):
+            Extra lines between random node pairs, as a fraction of the tree's lines.
+            Defaults to 0.0 (radial).
+        source_type (str, optional):
+            The type of the source. Defaults to "turbine".
+        seed (int | numpy.random.SeedSequence, optional):
+            Seed of the topology and of the circuit's parameters. Defaults to None (unseeded).
+        dss (AltDSS, optional):
+            Engine context to build the circuit in (see PyGridSim).
+
+    Returns:
+        PyGridSim:
+            The generated circuit, not yet solved.
+    """
+    line_types = line_types or {"lv": 1.0}
+    if branching < 1:
+        raise ValueError("Branching factor must be at least 1")
+    if mesh < 0:
+        raise ValueError("Mesh fraction cannot be negative")
+    if any(num < 0 for num in loads.values()):
+        raise ValueError("Cannot have a negative number of loads")
+    shares = np.array(list(line_types.values()), dtype=np.float64)
+    if len(shares) == 0 or np.any(shares < 0) or shares.sum() <= 0:
+        raise ValueError("Line type shares must be non-negative, and not all zero")
+    load_types = [_get_enum_obj(LoadType, load_type).value for load_type in loads]
+    line_type_values = [_get_enum_obj(LineType, line_type).value for line_type in line_types]
+
+    circuit = PyGridSim(seed=seed, dss=dss)
+    rng = circuit.sampler.spawn(1)[0].rng
+
+    num_loads = sum(loads.values())
+    names = np.array(["source"] + [f"load{count}" for count in range(num_loads)])
+    # shuffle the loads over the tree, so load types mix along the feeder
+    names[1:] = names[1:][rng.permutation(num_loads)]
+    edges = names[_feeder_edges(num_loads + 1, branching, mesh, rng)]
+    edge_types = rng.choice(len(line_type_values), len(edges), p=shares / shares.sum())
+
+    circuit.update_source(source_type=source_type)
+    for load_type, num in zip(load_types, loads.values()):
+        if num:
+            circuit.add_load_nodes(load_type=load_type, num=num)
+    for index, line_type in enumerate(line_type_values):
+        connections = edges[edge_types == index]
+        if len(connections):
+            circuit.add_lines(connections, line_type=line_type)
+
+    return circuit
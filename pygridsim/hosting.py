@@ -0,0 +1,81 @@
+"""
+PV hosting capacity of load buses, found by bisecting the size of a probe PV system
+"""
+import numpy as np
+
+from pygridsim.parameters import _command, _run_script
+from pygridsim.results import _node_buses
+
+# internal name of the probe, "pv" is a reserved prefix so no nickname can clash with it
+PROBE_NAME = "pvhosting"
+
+
+def _get_probe(dss):
+    # created once per circuit and moved between buses, so every bisection step only edits
+    # the probe and re-solves
+    if PROBE_NAME not in dss.PVSystem:
+        _run_script(dss, _command("new", f"pvsystem.{PROBE_NAME}", bus1="source", Pmpp=0,
+                                  kVA=0, irradiance=1, enabled="no"))
+    return dss.PVSystem[PROBE_NAME]
+
+
+def _node_bases(dss, node_index):
+    # nominal line to neutral volts of every node, as BusVMag() lists one magnitude per node
+    # of multi-phase buses; NaN (never a violation) if the bus is not indexed
+    bus_names = dss.BusNames()
+    bases = np.full(len(bus_names), np.nan)
+    for i, name in enumerate(bus_names):
+        info = node_index.get(name)
+        if info is not None:
+            bases[i] = info.kV * 1000 / (np.sqrt(3) if info.phases > 1 else 1)
+    return bases[_node_buses(bus_names, dss.NodeNames())]
+
+
+def _within_limits(dss, bases, v_min, v_max, max_loss):
+    dss.Solution.Solve()
+    voltages = dss.BusVMag() / bases
+    if np.any(voltages < v_min) or np.any(voltages > v_max):
+        return False
+    return max_loss is None or dss.Losses().real <= max_loss
+
+
+def _bus_capacity(dss, probe, bases, limits, max_kw, tolerance):
+    # bisects the largest size within limits, assuming sizes above a violation also violate
+    def within(kw):
+        probe.Pmpp = kw
+        probe.kVA = kw
+        return _within_limits(dss, bases, *limits)
+
+    if within(max_kw):
+        return max_kw
+    low, high = 0.0, max_kw
+    while high - low > tolerance:
+        middle = (low + high) / 2
+        if within(middle):
+            low = middle
+        else:
+            high = middle
+    return low
+
+
+def _hosting_capacity(dss, node_index, buses, v_min, v_max, loss_limit, max_kw, tolerance):
+    probe = _get_probe(dss)
+    probe.Enabled = False
+    dss.Solution.Solve()
+    bases = _node_bases(dss, node_index)
+    if not _within_limits(dss, bases, v_min, v_max, None):
+        # the circuit violates the voltage limits without any PV
+        return np.zeros(len(buses))
+    max_loss = None if loss_limit is None else dss.Losses().real * loss_limit
+    limits = (v_min, v_max, max_loss)
+
+    capacity = np.empty(len(buses))
+    probe.Enabled = True
+    for i, bus in enumerate(buses):
+        info = node_index[bus]
+        probe.edit(Bus1=bus, Phases=info.phases, kV=info.kV)
+        capacity[i] = _bus_capacity(dss, probe, bases, limits, max_kw, tolerance)
+    # leave the circuit as it was built, solved without the probe
+    probe.Enabled = False
+    dss.Solution.Solve()
+    return capacity
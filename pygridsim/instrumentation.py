@@ -0,0 +1,174 @@
+"""
+Opt-in timing and call counting of PyGridSim phases and helpers
+"""
+import functools
+import time
+from contextlib import nullcontext
+
+
+class CallStats:
+    __slots__ = ["calls", "total_seconds", "max_seconds"]
+
+    def __init__(self):
+        """Initialize the statistics of one timed name.
+
+        Attributes:
+            calls (int): Number of timed calls.
+            total_seconds (float): Wall time of all calls.
+            max_seconds (float): Wall time of the slowest call.
+        """
+        self.calls = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "total_seconds": self.total_seconds,
+            "max_seconds": self.max_seconds,
+        }
+
+
+class _Timer:
+    __slots__ = ["profiler", "name", "start"]
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.profiler.record(self.name, time.perf_counter() - self.start)
+
+
+class Profiler:
+    enabled = True
+
+    def __init__(self, hooks: list = None):
+        """Initialize a profiler that records wall time and call counts by name.
+
+        Public PyGridSim methods are recorded under their own name (e.g. "add_lines",
+        "solve"), and the helpers they call under the helper's name (e.g. "_compile_lines",
+        "_run_script", "Solution.Solve", "_query_solution"), so a slow run can be broken
+        down by phase. One profiler can be shared by several circuits to aggregate them.
+
+        Args:
+            hooks (list[callable], optional):
+                Functions called as hook(name, seconds) after every timed call, e.g. to
+                forward timings to a metrics pipeline. Defaults to None.
+
+        Attributes:
+            stats (dict[str, CallStats]): Statistics of every timed name.
+            hooks (list[callable]): Functions called after every timed call.
+        """
+        self.stats = {}
+        self.hooks = list(hooks or [])
+
+    def timer(self, name: str):
+        """Times a block of code under a name.
+
+        Args:
+            name (str):
+                Name to record the time under.
+
+        Returns:
+            A context manager timing its block.
+        """
+        return _Timer(self, name)
+
+    def record(self, name: str, seconds: float):
+        """Records one call of a name.
+
+        Args:
+            name (str):
+                Name of the timed call.
+            seconds (float):
+                Wall time of the call.
+
+        Returns:
+            None
+        """
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = CallStats()
+        stats.calls += 1
+        stats.total_seconds += seconds
+        stats.max_seconds = max(stats.max_seconds, seconds)
+        for hook in self.hooks:
+            hook(name, seconds)
+
+    def as_dict(self):
+        """Gets the recorded statistics as plain values, e.g. to export them.
+
+        Returns:
+            dict[str, dict]:
+                "calls", "total_seconds" and "max_seconds" of every timed name.
+        """
+        return {name: stats.as_dict() for name, stats in self.stats.items()}
+
+    def report(self):
+        """Formats the recorded statistics as a table, slowest total first.
+
+        Returns:
+            str:
+                The table.
+        """
+        lines = [f"{'name':<24}{'calls':>8}{'total (s)':>12}{'max (s)':>12}"]
+        for name, stats in sorted(self.stats.items(), key=lambda item: -item[1].total_seconds):
+            lines.append(f"{name:<24}{stats.calls:>8}{stats.total_seconds:>12.4f}"
+                         f"{stats.max_seconds:>12.4f}")
+        return "\n".join(lines)
+
+    def reset(self):
+        """Discards the recorded statistics.
+
+        Returns:
+            None
+        """
+        self.stats = {}
+
+
+class NullProfiler:
+    enabled = False
+
+    # one shared no-op context, so disabled timing costs a method call and nothing else
+    _context = nullcontext()
+
+    def __init__(self):
+        """Initialize a profiler that records nothing, used when profiling is disabled.
+
+        Attributes:
+            stats (dict): Always empty.
+            hooks (list): Always empty.
+        """
+        self.stats = {}
+        self.hooks = []
+
+    def timer(self, name: str):
+        return self._context
+
+    def record(self, name: str, seconds: float):
+        pass
+
+    def as_dict(self):
+        return {}
+
+    def report(self):
+        return ""
+
+    def reset(self):
+        pass
+
+
+def _profiled(method):
+    # times every call of a PyGridSim method with the circuit's profiler
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.profiler.timer(name):
+            return method(self, *args, **kwargs)
+
+    return wrapper
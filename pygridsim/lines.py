@@ -1,47 +1,69 @@
-from altdss import Transformer, altdss
-from dss.enums import LineUnits
+import numpy as np
 
 import pygridsim.defaults as defaults
 from pygridsim.configs import LINE_CONFIGURATIONS
 from pygridsim.enums import LineType
-from pygridsim.parameters import _check_valid_params, _get_enum_obj, _get_param, _random_param
+from pygridsim.parameters import (
+    _check_valid_params, _command, _get_batch_param, _get_element, _get_enum_obj, _get_param,
+    _quote,)
 
 
-def _get_kv(node_name):
-    if node_name == "source" and node_name in altdss.Vsource:
-        return altdss.Vsource[node_name].BasekV
-    elif "load" in node_name and node_name in altdss.Load:
-        return altdss.Load[node_name].kV
-    elif "generator" in node_name and node_name in altdss.Generator:
-        return altdss.Generator[node_name].kV
-    else:
+def _get_kv(node_index, node_name):
+    if node_name not in node_index:
         raise KeyError("Invalid src or dst name")
+    return node_index[node_name].kV
 
 
-def _make_line(src, dst, line_type, count, params={}, transformer=True):
+def _compile_lines(connections, line_type, start, params, transformer, sampler, node_index):
     _check_valid_params(params, defaults.VALID_LINE_TRANSFORMER_PARAMS)
     line_type_obj = _get_enum_obj(LineType, line_type)
-    line = altdss.Line.new('line' + str(count))
-    line.Phases = defaults.PHASES
-    rand_length = _random_param(LINE_CONFIGURATIONS[line_type_obj]["length"])
-    line.Length = _get_param(params, "length", rand_length)
-    line.Bus1 = src
-    line.Bus2 = dst
-    line.Units = LineUnits.km
-
-    if (line.Length) < 0:
+    line_type_param = LINE_CONFIGURATIONS[line_type_obj]["length"]
+    num = len(connections)
+    lengths = _get_batch_param(params, "length", line_type_param, num, sampler)
+    lengths = np.broadcast_to(lengths, num)
+    if np.any(lengths < 0):
         raise ValueError("Cannot have negative length")
 
-    if not transformer:
-        return
+    # format the properties shared by every line once, and fill in the rest per line
+    line_template = _command("new", "line.line{}", phases=defaults.PHASES,
+                             units=defaults.LINE_UNITS) + " length={!r} bus1={} bus2={}"
+    transformer_template = _command(
+        "new", "transformer.transformer{}",
+        phases=defaults.PHASES,
+        windings=defaults.NUM_WINDINGS,
+        XHL=_get_param(params, "XHL", defaults.XHL),
+        conns=[defaults.PRIMARY_CONN, defaults.SECONDARY_CONN]) + " buses=[{} {}] kVs=[{!r} {!r}]"
 
-    # automatically add transformer to every line
-    transformer: Transformer = altdss.Transformer.new('transformer' + str(count))
-    transformer.Phases = defaults.PHASES
-    transformer.Windings = defaults.NUM_WINDINGS
-    transformer.XHL = _get_param(params, "XHL", defaults.XHL)
-    transformer.Buses = [src, dst]
-    transformer.Conns = [defaults.PRIMARY_CONN, defaults.SECONDARY_CONN]
-    transformer.kVs = [_get_kv(src), _get_kv(dst)]
+    commands = []
+    for count, ((src, dst), length) in enumerate(zip(connections, lengths.tolist()), start):
+        if transformer:
+            src_kv, dst_kv = float(_get_kv(node_index, src)), float(_get_kv(node_index, dst))
+        src, dst = _quote(src), _quote(dst)
+        commands.append(line_template.format(count, float(length), src, dst))
+        if transformer:
+            # automatically add transformer to every line
+            commands.append(transformer_template.format(count, src, dst, src_kv, dst_kv))
+    return commands
 
-    transformer.end_edit()
+
+def _update_line(dss, name, params):
+    _check_valid_params(params, defaults.VALID_LINE_TRANSFORMER_PARAMS)
+    line = _get_element(dss.Line, name)
+    if "length" in params:
+        if params["length"] < 0:
+            raise ValueError("Cannot have negative length")
+        line.Length = params["length"]
+
+    transformer_name = "transformer" + name[len("line"):]
+    if "XHL" in params and transformer_name in dss.Transformer:
+        dss.Transformer[transformer_name].XHL = params["XHL"]
+
+    return line
+
+
+def _update_transformer_kvs(dss, transformers, kv):
+    for name, winding in transformers:
+        transformer = dss.Transformer[name]
+        kvs = list(transformer.kVs)
+        kvs[winding] = kv
+        transformer.kVs = kvs
@@ -0,0 +1,265 @@
+"""
+Compact in-memory model of the circuit's components, kept alongside the engine
+"""
+import numpy as np
+
+KINDS = ["source", "load", "generator", "pv", "line"]
+
+# one packed record per component, 26 bytes; buses are ids into the model's bus names and
+# fields that do not apply to a kind (e.g. the length of a load) are NaN or -1
+MODEL_DTYPE = np.dtype([
+    ("bus1", np.int32),
+    ("bus2", np.int32),
+    ("kV", np.float32),
+    ("kW", np.float32),
+    ("kvar", np.float32),
+    ("length", np.float32),
+    ("phases", np.uint8),
+    ("transformer", np.bool_),
+])
+FIELDS = ["kV", "kW", "kvar", "length", "phases"]
+
+# engine collection and properties read into every kind's fields
+ENGINE_FIELDS = {
+    "source": ("Vsource", {"kV": "BasekV", "phases": "Phases"}),
+    "load": ("Load", {"kV": "kV", "kW": "kW", "kvar": "kvar", "phases": "Phases"}),
+    "generator": ("Generator", {"kV": "kV", "kW": "kW", "kvar": "kvar", "phases": "Phases"}),
+    "pv": ("PVSystem", {"kV": "kV", "kW": "Pmpp", "phases": "Phases"}),
+    "line": ("Line", {"length": "Length", "phases": "Phases"}),
+}
+
+
+def _find_batch(collection, names):
+    # the engine appends new elements to their collection, so elements created together are
+    # found at its end; other elements of the collection (e.g. the hosting capacity probe)
+    # mean engine indices differ from the circuit's counters, so the names are checked
+    end = len(collection)
+    batch = collection.batch(idx=np.arange(end - len(names), end))
+    if batch.Name != names:
+        index = {name: i for i, name in enumerate(collection.Name)}
+        batch = collection.batch(idx=[index[name] for name in names])
+    return batch
+
+
+def _read_components(dss, kind, names):
+    # one bulk read per property, of the named elements only
+    collection, properties = ENGINE_FIELDS[kind]
+    batch = _find_batch(getattr(dss, collection), names)
+    return {field: np.asarray(getattr(batch, prop)) for field, prop in properties.items()}
+
+
+def _read_component(dss, kind, name):
+    collection, properties = ENGINE_FIELDS[kind]
+    element = getattr(dss, collection)[name]
+    return {field: getattr(element, prop) for field, prop in properties.items()}
+
+
+def _empty(num):
+    records = np.zeros(num, dtype=MODEL_DTYPE)
+    records[["bus1", "bus2"]] = (-1, -1)
+    for field in ["kV", "kW", "kvar", "length"]:
+        records[field] = np.nan
+    return records
+
+
+def _same(first, second):
+    # rows whose fields all match, NaN matching NaN
+    same = np.ones(len(first), dtype=bool)
+    for field in MODEL_DTYPE.names:
+        a, b = first[field], second[field]
+        if a.dtype.kind == "f":
+            same &= (a == b) | (np.isnan(a) & np.isnan(b))
+        else:
+            same &= a == b
+    return same
+
+
+class CircuitModel:
+    def __init__(self, bus_names: list[str] = None):
+        """Initialize an empty model of a circuit's components.
+
+        Every component kind ("source", "load", "generator", "pv", "line") has a table of
+        packed records (see MODEL_DTYPE), where row i is the component named kind + i (e.g.
+        "load3"), or "source" for the source. Tables grow by doubling, so adding components
+        is amortized O(1), and reading one is a NumPy view without engine calls.
+
+        Args:
+            bus_names (list[str], optional):
+                Bus names that bus ids index into, shared with the circuit's topology so
+                new buses need no copy. Defaults to a new empty list.
+
+        Attributes:
+            bus_names (list[str]): Names of the buses, indexed by the records' bus ids.
+        """
+        self.bus_names = [] if bus_names is None else bus_names
+        self._tables = {kind: _empty(0) for kind in KINDS}
+        self._sizes = dict.fromkeys(KINDS, 0)
+
+    def __len__(self):
+        return sum(self._sizes.values())
+
+    @property
+    def nbytes(self):
+        return sum(self.table(kind).nbytes for kind in KINDS)
+
+    def table(self, kind: str):
+        """Gets the records of every component of a kind.
+
+        Args:
+            kind (str):
+                One of "source", "load", "generator", "pv", "line".
+
+        Returns:
+            numpy.ndarray:
+                Structured array of MODEL_DTYPE, a view that later updates show through.
+        """
+        if kind not in self._tables:
+            raise KeyError(f"Invalid component kind {kind}: expect one of {KINDS}")
+        return self._tables[kind][:self._sizes[kind]]
+
+    def names(self, kind: str):
+        """Gets the internal names of every component of a kind, aligned with its table.
+
+        Args:
+            kind (str):
+                One of "source", "load", "generator", "pv", "line".
+
+        Returns:
+            numpy.ndarray:
+                Names as a str array.
+        """
+        num = len(self.table(kind))
+        if kind == "source":
+            return np.full(num, "source")
+        return np.char.add(kind, np.arange(num).astype(np.str_))
+
+    def buses(self, kind: str, terminal: int = 1):
+        """Gets the bus names of every component of a kind, aligned with its table.
+
+        Args:
+            kind (str):
+                One of "source", "load", "generator", "pv", "line".
+            terminal (int, optional):
+                1 for the bus of every component, 2 for the destination bus of lines.
+                Defaults to 1.
+
+        Returns:
+            numpy.ndarray:
+                Bus names as a str array ("" for no bus).
+        """
+        ids = self.table(kind)["bus1" if terminal == 1 else "bus2"]
+        names = np.asarray(self.bus_names + [""], dtype=np.str_)
+        return names[ids]
+
+    def append(self, kind: str, num: int, **columns):
+        """Adds records of new components of a kind, numbered after the existing ones.
+
+        Args:
+            kind (str):
+                One of "source", "load", "generator", "pv", "line".
+            num (int):
+                Number of new components.
+            **columns:
+                Values of MODEL_DTYPE fields, each a scalar or an array of num values.
+                Missing fields are NaN or -1.
+
+        Returns:
+            None
+        """
+        table, size = self._tables[kind], self._sizes[kind]
+        if size + num > len(table):
+            grown = _empty(max(size + num, 2 * len(table)))
+            grown[:size] = table[:size]
+            self._tables[kind] = table = grown
+        for field, values in columns.items():
+            table[field][size:size + num] = values
+        self._sizes[kind] = size + num
+
+    def update(self, kind: str, index: int, **columns):
+        """Changes fields of one component.
+
+        Args:
+            kind (str):
+                One of "source", "load", "generator", "pv", "line".
+            index (int):
+                Number of the component, e.g. 3 for "load3".
+            **columns:
+                New values of MODEL_DTYPE fields.
+
+        Returns:
+            None
+        """
+        record = self.table(kind)[index]
+        for field, value in columns.items():
+            record[field] = value
+
+    def save(self, path: str):
+        """Saves the model to a ".npz" file.
+
+        Args:
+            path (str):
+                Path of the file.
+
+        Returns:
+            None
+        """
+        arrays = {kind: self.table(kind) for kind in KINDS}
+        np.savez(path, bus_names=np.asarray(self.bus_names, dtype=np.str_), **arrays)
+
+    @classmethod
+    def load(cls, path: str):
+        """Loads a model saved with save().
+
+        Args:
+            path (str):
+                Path of the file.
+
+        Returns:
+            CircuitModel:
+                The model, detached from any circuit.
+        """
+        with np.load(path, allow_pickle=False) as arrays:
+            model = cls(arrays["bus_names"].tolist())
+            for kind in KINDS:
+                records = arrays[kind]
+                model.append(kind, len(records),
+                             **{field: records[field] for field in MODEL_DTYPE.names})
+        return model
+
+    def diff(self, other: "CircuitModel"):
+        """Compares this model with another one, component by component.
+
+        Components are matched by name, and buses are compared by name, so models of
+        separately built circuits can be compared.
+
+        Args:
+            other (CircuitModel):
+                The model to compare against, e.g. an earlier save of the same circuit.
+
+        Returns:
+            dict[str, dict]:
+                For every kind with differences, the names of the components only in other
+                ("added"), only in this model ("removed"), and in both with different
+                fields ("changed"), as str arrays.
+        """
+        same_buses = self.bus_names == other.bus_names
+        bus_ids = {"": -1}
+        differences = {}
+        for kind in KINDS:
+            common = min(len(self.table(kind)), len(other.table(kind)))
+            mine, theirs = self.table(kind)[:common], other.table(kind)[:common]
+            if not same_buses:
+                mine, theirs = mine.copy(), theirs.copy()
+                for model, records in [(self, mine), (other, theirs)]:
+                    for terminal, field in enumerate(["bus1", "bus2"], 1):
+                        names = model.buses(kind, terminal)[:common].tolist()
+                        records[field] = [bus_ids.setdefault(name, len(bus_ids))
+                                          for name in names]
+            result = {
+                "added": other.names(kind)[common:],
+                "removed": self.names(kind)[common:],
+                "changed": self.names(kind)[np.flatnonzero(~_same(mine, theirs))],
+            }
+            if any(len(value) for value in result.values()):
+                differences[kind] = result
+        return differences
@@ -0,0 +1,189 @@
+"""
+Registry of nicknames, mapping them to internal names and back
+"""
+import sys
+from collections.abc import Mapping
+
+import numpy as np
+
+from pygridsim.defaults import RESERVED_PREFIXES
+from pygridsim.model import KINDS
+
+KIND_IDS = {kind: kind_id for kind_id, kind in enumerate(KINDS)}
+# str.startswith checks a whole tuple in one call
+_RESERVED = tuple(RESERVED_PREFIXES)
+
+
+def _split_name(name):
+    # "load12" -> ("load", 12), None for names that are not internal element names
+    kind = name.rstrip("0123456789")
+    if kind not in KIND_IDS or len(kind) == len(name):
+        return None
+    return kind, int(name[len(kind):])
+
+
+class _NicknameView:
+    """Read-only map from internal names to nicknames, looked up in the registry's arrays."""
+
+    def __init__(self, registry):
+        self._registry = registry
+
+    def __len__(self):
+        return len(self._registry)
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def __getitem__(self, name):
+        nickname = self.get(name)
+        if nickname is None:
+            raise KeyError(name)
+        return nickname
+
+    def get(self, name, default=None):
+        registry = self._registry
+        split = _split_name(name)
+        if split is None:
+            return default
+        kind, index = split
+        ids = registry._nickname_ids[kind]
+        if index >= registry._sizes[kind] or ids[index] < 0:
+            return default
+        return registry._nicknames[ids[index]]
+
+
+class NameRegistry(Mapping):
+    def __init__(self):
+        """Initialize an empty registry of nicknames of circuit components.
+
+        Behaves as a read-only dict from nicknames to internal names (e.g. "home" to
+        "load0"), and inverse gives the map back from internal names to nicknames. Both
+        lookups are O(1). Internal names are never stored as strings: a nickname maps to a
+        packed (kind, index) code, and every kind keeps an int32 array from element index to
+        nickname id, so a registered nickname costs a dict entry, the interned nickname and
+        4 bytes.
+
+        Attributes:
+            inverse (Mapping): Read-only map from internal names to nicknames.
+        """
+        self._codes = {}
+        self._nicknames = []
+        self._nickname_ids = {kind: np.zeros(0, dtype=np.int32) for kind in KINDS}
+        self._sizes = dict.fromkeys(KINDS, 0)
+        self.inverse = _NicknameView(self)
+
+    def __len__(self):
+        return len(self._codes)
+
+    def __iter__(self):
+        return iter(self._codes)
+
+    def __contains__(self, nickname):
+        return nickname in self._codes
+
+    def __getitem__(self, nickname):
+        index, kind_id = divmod(self._codes[nickname], len(KINDS))
+        return KINDS[kind_id] + str(index)
+
+    def resolve(self, name: str):
+        """Gets the internal name of a nickname, or the name itself if it is not one.
+
+        Args:
+            name (str):
+                A nickname or an internal name.
+
+        Returns:
+            str:
+                The internal name.
+        """
+        return self[name] if name in self._codes else name
+
+    def validate(self, nicknames: list[str], taken: set = None):
+        """Checks a list of new nicknames at once, before any is registered.
+
+        Args:
+            nicknames (list[str]):
+                The new nicknames.
+            taken (set, optional):
+                Other nicknames that are about to be registered. Defaults to None.
+
+        Returns:
+            None
+        """
+        if len(set(nicknames)) != len(nicknames):
+            raise ValueError("Provided name already assigned to a node")
+        codes = self._codes
+        if any(nickname in codes for nickname in nicknames) or (
+                taken and not taken.isdisjoint(nicknames)):
+            raise ValueError("Provided name already assigned to a node")
+        if any(nickname.startswith(_RESERVED) for nickname in nicknames):
+            raise ValueError(
+                "Cannot name nodes of the format 'component + __', ambiguity with internal names")
+
+    def _grow(self, kind, size):
+        ids = self._nickname_ids[kind]
+        if size > len(ids):
+            grown = np.full(max(size, 2 * len(ids)), -1, dtype=np.int32)
+            grown[:len(ids)] = ids
+            self._nickname_ids[kind] = grown
+        self._sizes[kind] = max(self._sizes[kind], size)
+
+    def register(self, nicknames: list[str], kind: str, start: int):
+        """Assigns nicknames to consecutive components of a kind, validating them first.
+
+        Args:
+            nicknames (list[str]):
+                The nicknames, the first for component start (e.g. "load" + str(start)).
+            kind (str):
+                Kind of the components, e.g. "load" or "generator".
+            start (int):
+                Index of the first component.
+
+        Returns:
+            None
+        """
+        self.validate(nicknames)
+        num = len(nicknames)
+        if not num:
+            return
+        self._grow(kind, start + num)
+        first_id = len(self._nicknames)
+        self._nicknames.extend(sys.intern(nickname) for nickname in nicknames)
+        self._nickname_ids[kind][start:start + num] = np.arange(first_id, first_id + num)
+        kind_id = KIND_IDS[kind]
+        self._codes.update(zip(self._nicknames[first_id:],
+                               range(start * len(KINDS) + kind_id,
+                                     (start + num) * len(KINDS) + kind_id, len(KINDS))))
+
+    def register_names(self, nickname_to_name: dict[str, str]):
+        """Registers nicknames of arbitrary internal names, e.g. compiled from a spec.
+
+        Args:
+            nickname_to_name (dict[str, str]):
+                Map from the new nicknames to internal names.
+
+        Returns:
+            None
+        """
+        self.validate(list(nickname_to_name))
+        for nickname, name in nickname_to_name.items():
+            kind, index = _split_name(name)
+            self.register([nickname], kind, index)
+
+    def nicknames(self, names):
+        """Gets the nicknames of many internal names at once.
+
+        Args:
+            names (list[str] | numpy.ndarray):
+                Internal names.
+
+        Returns:
+            numpy.ndarray:
+                Nicknames as a str array, "" for names without one.
+        """
+        if not self._codes:
+            return np.full(len(names), "", dtype=np.str_)
+        get = self.inverse.get
+        if isinstance(names, np.ndarray):
+            names = names.tolist()
+        return np.asarray([get(name, "") for name in names], dtype=np.str_)
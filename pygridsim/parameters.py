@@ -1,14 +1,17 @@
 """
 Helper functions to parse the parameters used for loads and sources
 """
-import random
+from collections import namedtuple
 
-from altdss import Generator, Load, PVSystem, altdss
+import numpy as np
 
+import pygridsim.configs as configs
 import pygridsim.defaults as defaults
-from pygridsim.configs import GENERATOR_CONFIGURATIONS, LOAD_CONFIGURATIONS, SOURCE_CONFIGURATIONS
 from pygridsim.enums import GeneratorType, LoadType, SourceType
 
+# what lines need to know about a node without asking the engine
+NodeInfo = namedtuple("NodeInfo", ["kind", "kV", "phases"])
+
 
 def _get_enum_obj(enum_class, enum_val):
     enum_obj = None
@@ -22,14 +25,6 @@ def _get_enum_obj(enum_class, enum_val):
     return enum_obj
 
 
-def _random_param(range):
-    if type(range) is not list:
-        return range
-
-    [max, min] = range
-    return random.random() * (max - min) + min
-
-
 def _get_param(params, name, default):
     if name in params:
         return params[name]
@@ -48,30 +43,125 @@ def _check_valid_params(params, valid_params):
             raise ValueError("KV cannot be less than 0")
 
 
-def _make_load_node(load_params, load_type, count):
+def _get_element(collection, name):
+    if name not in collection:
+        raise KeyError(f"Invalid element name {name}")
+    return collection[name]
+
+
+def _set_params(element, params):
+    # parameter names match engine properties, except for a few capitalized ones
+    properties = {defaults.PARAM_PROPERTIES.get(key, key): value for key, value in params.items()}
+    element.edit(**properties)
+
+
+def _make_names(prefix, start, num):
+    return [prefix + str(count) for count in range(start, start + num)]
+
+
+def _get_batch_param(params, name, default, num, sampler):
+    if name in params:
+        return params[name]
+    else:
+        return sampler.sample(default, num)
+
+
+def _batch_new(collection, names, **properties):
+    # the engine's duplicate name check stays on, as for scripts (see _run_script)
+    return collection.batch_new(names, **properties)
+
+
+def _quote(value):
+    # values are quoted so names with spaces or separators parse as one token; the engine's
+    # parser has no escapes, and every command of a script ends at a line break
+    if '"' in value or "\n" in value or "\r" in value:
+        raise ValueError(f"Name {value!r} cannot contain double quotes or line breaks")
+    return f'"{value}"'
+
+
+def _format_value(value):
+    if isinstance(value, str):
+        return _quote(value)
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return "[" + " ".join(_format_value(item) for item in value) + "]"
+    if isinstance(value, (int, np.integer)):
+        return str(int(value))
+    # repr keeps every digit, so values set through a script equal the ones set directly
+    return repr(float(value))
+
+
+def _command(action, element, **properties):
+    return " ".join([action, element] + [f"{key}={_format_value(value)}"
+                                         for key, value in properties.items()])
+
+
+def _run_script(dss, script):
+    # one engine call for a whole block of commands, for elements that batch_new cannot
+    # create (e.g. per-element list properties such as transformer buses). The duplicate
+    # name check stays on: a script the engine stops partway leaves elements the counters
+    # do not know of, and the next script naming them again must fail instead of
+    # creating a second element of the same name.
+    dss(script)
+
+
+def _index_nodes(node_index, kind, batch):
+    for name, kv, phases in zip(batch.Name, batch.kV, batch.Phases):
+        node_index[name] = NodeInfo(kind, float(kv), int(phases))
+
+
+def _make_loadshape(dss, name, mult, interval):
+    properties = {"NPts": len(mult), "Interval": interval, "PMult": mult}
+    if name in dss.LoadShape:
+        return dss.LoadShape[name].edit(**properties)
+    return dss.LoadShape.new(name, **properties)
+
+
+def _get_loadshapes(dss, load_type_obj):
+    # every load type has a daily and a yearly shape; the yearly one starts as the
+    # daily curve, which the engine repeats for every day of the year
+    daily, yearly = load_type_obj.value, load_type_obj.value + "_yearly"
+    for name in [daily, yearly]:
+        if name not in dss.LoadShape:
+            _make_loadshape(dss, name, configs.LOADSHAPE_CONFIGURATIONS[load_type_obj],
+                            defaults.LOADSHAPE_INTERVAL)
+    return daily, yearly
+
+
+def _make_load_nodes(dss, load_params, load_type, start, num, sampler):
     _check_valid_params(load_params, defaults.VALID_LOAD_PARAMS)
     load_type_obj = _get_enum_obj(LoadType, load_type)
+    daily, yearly = _get_loadshapes(dss, load_type_obj)
 
-    load: Load = altdss.Load.new('load' + str(count))
-    load.Bus1 = 'load' + str(count)
-    load.Phases = _get_param(load_params, "phases", defaults.PHASES)
+    names = _make_names('load', start, num)
+    properties = {}
     for attr in ["kV", "kW", "kvar"]:
-        load_type_param = LOAD_CONFIGURATIONS[load_type_obj][attr]
-        setattr(load, attr, _get_param(load_params, attr, _random_param(load_type_param)))
+        load_type_param = configs.LOAD_CONFIGURATIONS[load_type_obj][attr]
+        properties[attr] = _get_batch_param(load_params, attr, load_type_param, num, sampler)
+
+    return _batch_new(dss.Load, names,
+                      Bus1=names,
+                      Phases=_get_param(load_params, "phases", defaults.PHASES),
+                      **properties,
+                      Daily=daily,
+                      Yearly=yearly)
+
 
-    load.Daily = 'default'
+def _update_load_node(dss, name, load_params):
+    _check_valid_params(load_params, defaults.VALID_LOAD_PARAMS)
+    load = _get_element(dss.Load, name)
+    _set_params(load, load_params)
     return load
 
 
-def _make_source_node(source_params, source_type):
+def _make_source_node(dss, source_params, source_type, sampler):
     _check_valid_params(source_params, defaults.VALID_SOURCE_PARAMS)
     source_type_obj = _get_enum_obj(SourceType, source_type)
 
-    source = altdss.Vsource[0]
+    source = dss.Vsource[0]
     source.Bus1 = 'source'
     source.Phases = _get_param(source_params, "phases", defaults.PHASES)
-    source_type_param = SOURCE_CONFIGURATIONS[source_type_obj]["kV"]
-    source.BasekV = _get_param(source_params, "kV", _random_param(source_type_param))
+    source_type_param = configs.SOURCE_CONFIGURATIONS[source_type_obj]["kV"]
+    source.BasekV = _get_param(source_params, "kV", sampler.sample(source_type_param))
     source.Frequency = _get_param(source_params, "frequency", defaults.FREQUENCY)
 
     for imp in defaults.IMPEDANCE_PARAMS:
@@ -80,21 +170,48 @@ def _make_source_node(source_params, source_type):
     return source
 
 
-def _make_pv(load_node, params, num_panels, count):
+def _update_source_node(dss, source_params):
+    _check_valid_params(source_params, defaults.VALID_SOURCE_PARAMS)
+    source = dss.Vsource[0]
+    # unlike loads and generators, the source's kV is its base kV
+    source_params = {("BasekV" if key == "kV" else key): value
+                     for key, value in source_params.items()}
+    _set_params(source, source_params)
+    return source
+
+
+def _make_pvs(dss, load_nodes, params, num_panels, start, sampler):
     _check_valid_params(params, defaults.VALID_PV_PARAMS)
-    pv: PVSystem = altdss.PVSystem.new('pv' + str(count))
-    pv.Bus1 = load_node
-    pv.Phases = _get_param(params, "phases", defaults.PHASES)
-    pv.kV = _get_param(params, "kV", _random_param(defaults.SOLAR_PANEL_BASE_KV) * num_panels)
+    num = len(load_nodes)
+    if "kV" in params:
+        kv = params["kV"]
+    else:
+        kv = sampler.sample(defaults.SOLAR_PANEL_BASE_KV, num) * num_panels
 
+    return _batch_new(dss.PVSystem, _make_names('pv', start, num),
+                      Bus1=load_nodes,
+                      Phases=_get_param(params, "phases", defaults.PHASES),
+                      kV=kv)
 
-def _make_generator(params, gen_type, count):
+
+def _make_generators(dss, params, gen_type, start, num, sampler):
     _check_valid_params(params, defaults.VALID_GENERATOR_PARAMS)
     gen_type_obj = _get_enum_obj(GeneratorType, gen_type)
 
-    generator: Generator = altdss.Generator.new('generator' + str(count))
-    generator.Bus1 = 'generator' + str(count)
-    generator.Phases = _get_param(params, "phases", defaults.PHASES)
+    names = _make_names('generator', start, num)
+    properties = {}
     for attr in ["kV", "kW"]:
-        gen_type_param = GENERATOR_CONFIGURATIONS[gen_type_obj][attr]
-        setattr(generator, attr, _get_param(params, attr, _random_param(gen_type_param)))
+        gen_type_param = configs.GENERATOR_CONFIGURATIONS[gen_type_obj][attr]
+        properties[attr] = _get_batch_param(params, attr, gen_type_param, num, sampler)
+
+    return _batch_new(dss.Generator, names,
+                      Bus1=names,
+                      Phases=_get_param(params, "phases", defaults.PHASES),
+                      **properties)
+
+
+def _update_generator(dss, name, params):
+    _check_valid_params(params, defaults.VALID_GENERATOR_PARAMS)
+    generator = _get_element(dss.Generator, name)
+    _set_params(generator, params)
+    return generator
@@ -2,19 +2,150 @@
 Defines the set of allowed queries (i.e. baseKV at every node) and
 provides helpers for the solve/results function.
 """
+import importlib
 import json
+import os
+import zipfile
+from functools import cached_property
 
-from altdss import altdss
+import numpy as np
 
 
-def _query_solution(query, name_to_nickname):
+class SolutionSnapshot:
+    def __init__(self, dss):
+        """Lazy view of the engine quantities of one solution.
+
+        Every quantity is fetched from the engine the first time a query needs it
+        and served from memory afterwards. A new snapshot is taken on every solve.
+
+        Args:
+            dss (AltDSS): Engine context holding the solved circuit.
+        """
+        self.dss = dss
+
+    @cached_property
+    def losses(self):
+        return self.dss.Losses()
+
+    @cached_property
+    def total_power(self):
+        return self.dss.TotalPower()
+
+    @cached_property
+    def bus_names(self):
+        return self.dss.BusNames()
+
+    @cached_property
+    def bus_vmag(self):
+        return self.dss.BusVMag()
+
+    @cached_property
+    def bus_name_array(self):
+        return np.asarray(self.bus_names, dtype=np.str_)
+
+    @cached_property
+    def bus_mean_vmag(self):
+        # BusVMag() lists one magnitude per node, this is one per bus: the average of its
+        # nodes, as in time-series results
+        node_buses = _node_buses(self.bus_names, self.dss.NodeNames())
+        num_buses = len(self.bus_names)
+        return (np.bincount(node_buses, weights=self.bus_vmag, minlength=num_buses)
+                / np.bincount(node_buses, minlength=num_buses))
+
+    # per-element quantities are fetched for a whole collection in one engine call each
+
+    @cached_property
+    def line_names(self):
+        return self.dss.Line.Name
+
+    @cached_property
+    def line_currents(self):
+        return self.dss.Line.MaxCurrent(1)
+
+    @cached_property
+    def line_powers(self):
+        return _first_terminal(self.dss.Line.TotalPowers(), len(self.line_names))
+
+    @cached_property
+    def load_names(self):
+        return self.dss.Load.Name
+
+    @cached_property
+    def load_powers(self):
+        return self.dss.Load.TotalPowers()
+
+    @cached_property
+    def generator_names(self):
+        return self.dss.Generator.Name
+
+    @cached_property
+    def generator_powers(self):
+        return self.dss.Generator.TotalPowers()
+
+    @cached_property
+    def transformer_names(self):
+        return self.dss.Transformer.Name
+
+    @cached_property
+    def transformer_powers(self):
+        return _first_terminal(self.dss.Transformer.TotalPowers(), len(self.transformer_names))
+
+    @cached_property
+    def transformer_kvas(self):
+        return np.asarray([kvas[0] for kvas in self.dss.Transformer.kVAs], dtype=np.float64)
+
+
+def _node_buses(bus_names, node_names):
+    # index into bus_names of every node ("bus.phase"), in the order of the engine's node arrays
+    bus_ids = {name: i for i, name in enumerate(bus_names)}
+    return np.fromiter((bus_ids[node.rsplit(".", 1)[0]] for node in node_names),
+                       dtype=np.intp, count=len(node_names))
+
+
+def _first_terminal(powers, num):
+    # elements list the total power of every terminal, the first one is the sending end
+    return powers[::len(powers) // num] if num else powers
+
+
+def _read_only(array):
+    # arrays may be the snapshot's cached buffers, shared by every query of the solution,
+    # so callers get views they cannot write through
+    view = np.asarray(array).view()
+    view.flags.writeable = False
+    return view
+
+
+def _element_arrays(names, name_to_nickname, **values):
+    names = np.asarray(names, dtype=np.str_)
+    if name_to_nickname:
+        nicknames = np.asarray([name_to_nickname.get(name, "") for name in names.tolist()],
+                               dtype=np.str_)
+    else:
+        nicknames = np.full(names.shape, "", dtype=np.str_)
+
+    arrays = {"names": names, "nicknames": nicknames, **values}
+    return {key: _read_only(array) for key, array in arrays.items()}
+
+
+def _power_arrays(names, powers, name_to_nickname):
+    return _element_arrays(names, name_to_nickname,
+                           **{"Active Power": np.ascontiguousarray(powers.real),
+                              "Reactive Power": np.ascontiguousarray(powers.imag)})
+
+
+def _voltage_arrays(snapshot, name_to_nickname):
+    return _element_arrays(snapshot.bus_name_array, name_to_nickname,
+                           values=snapshot.bus_mean_vmag)
+
+
+def _query_solution(snapshot, query, name_to_nickname, as_arrays=False):
     query_fix = query.lower().replace(" ", "")
-    vector_losses = altdss.Losses()
-    vector_power = altdss.TotalPower()
     match query_fix:
+        case "voltages" if as_arrays:
+            return _voltage_arrays(snapshot, name_to_nickname)
         case "voltages":
             bus_vmags = {}
-            for bus_name, bus_vmag in zip(altdss.BusNames(), altdss.BusVMag()):
+            for bus_name, bus_vmag in zip(snapshot.bus_names, snapshot.bus_mean_vmag):
                 return_name = bus_name
                 if bus_name in name_to_nickname:
                     nickname = name_to_nickname[bus_name]
@@ -22,27 +153,218 @@ def _query_solution(query, name_to_nickname):
                 bus_vmags[return_name] = float(bus_vmag)
             return bus_vmags
         case "losses" | "loss":
+            vector_losses = snapshot.losses
             losses = {}
             losses["Active Power Loss"] = vector_losses.real
             losses["Reactive Power Loss"] = vector_losses.imag
             return losses
         case "totalpower" | "power":
+            vector_power = snapshot.total_power
             power = {}
             power["Active Power"] = vector_power.real
             power["Reactive Power"] = vector_power.imag
             return power
         case "activeloss" | "activepowerloss" | "realloss" | "realpowerloss":
-            return vector_losses.real
+            return snapshot.losses.real
         case "reactiveloss" | "reactivepowerloss":
-            return vector_losses.imag
+            return snapshot.losses.imag
         case "activepower" | "realpower":
-            return vector_power.real
+            return snapshot.total_power.real
         case "reactivepower":
-            return vector_power.imag
+            return snapshot.total_power.imag
+        case "linecurrents" | "linecurrent":
+            return _element_arrays(snapshot.line_names, name_to_nickname,
+                                   values=np.asarray(snapshot.line_currents, dtype=np.float64))
+        case "linepowers" | "linepower":
+            return _power_arrays(snapshot.line_names, snapshot.line_powers, name_to_nickname)
+        case "loadpowers" | "loadpower":
+            return _power_arrays(snapshot.load_names, snapshot.load_powers, name_to_nickname)
+        case "generatoroutput" | "generatorpowers" | "generatorpower":
+            # the engine counts power flowing into an element, generators deliver the opposite
+            return _power_arrays(snapshot.generator_names, -snapshot.generator_powers,
+                                 name_to_nickname)
+        case "transformerloading":
+            loading = 100 * np.abs(snapshot.transformer_powers) / snapshot.transformer_kvas
+            return _element_arrays(snapshot.transformer_names, name_to_nickname, values=loading)
         case _:
             return "Invalid"
 
 
-def _export_results(results, path):
-    with open(path, "w") as json_file:
-        json.dump(results, json_file, indent=4)
+def _to_json(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Cannot export result of type {type(value).__name__}")
+
+
+def _to_columns(value):
+    """Flattens one query result into aligned (names, values) arrays, or None if not numeric."""
+    if isinstance(value, dict) and "values" in value:
+        names, nicknames = value["names"], value["nicknames"]
+        named = np.char.add(np.char.add(names, "/"), nicknames)
+        return np.where(nicknames == "", names, named), np.asarray(value["values"])
+    if isinstance(value, dict):
+        return np.asarray(list(value), dtype=np.str_), np.asarray(list(value.values()), float)
+    if isinstance(value, (int, float)):
+        return np.asarray([""]), np.asarray([value], dtype=np.float64)
+    return None
+
+
+def _iter_columns(results):
+    for query, value in results.items():
+        if isinstance(value, dict) and "names" in value and "values" not in value:
+            # per-element powers hold several value arrays aligned with the same names
+            for field, values in value.items():
+                if field not in ("names", "nicknames"):
+                    columns = _to_columns({**value, "values": values})
+                    yield f"{query}/{field}", columns
+            continue
+        columns = _to_columns(value)
+        if columns is not None:
+            yield query, columns
+
+
+class _ResultWriter:
+    """Appends the results of successive results() calls (runs) to one file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.runs = 0
+
+    def write(self, results):
+        self._write(results)
+        self.runs += 1
+
+    def close(self):
+        pass
+
+    def __del__(self):
+        # a circuit that is dropped without close_exports() still leaves complete files
+        self.close()
+
+
+class _JSONWriter(_ResultWriter):
+    def _write(self, results):
+        # plain JSON holds a single document, so every run replaces the file
+        with open(self.path, "w") as json_file:
+            json.dump(results, json_file, indent=4, default=_to_json)
+
+
+class _JSONLinesWriter(_ResultWriter):
+    def _write(self, results):
+        with open(self.path, "a") as json_file:
+            json_file.write(json.dumps(results, default=_to_json) + "\n")
+
+
+class _NPZWriter(_ResultWriter):
+    def __init__(self, path):
+        super().__init__(path)
+        if os.path.exists(path):
+            with zipfile.ZipFile(path) as npz_file:
+                self.runs = len({name.split("/")[0] for name in npz_file.namelist()})
+
+    def _write(self, results):
+        # an npz file is a zip of .npy arrays, so new runs are added as new zip members
+        with zipfile.ZipFile(self.path, "a") as npz_file:
+            for query, (names, values) in _iter_columns(results):
+                for field, array in (("names", names), ("values", values)):
+                    with npz_file.open(f"run{self.runs}/{query}/{field}.npy", "w") as member:
+                        np.lib.format.write_array(member, array, allow_pickle=False)
+
+
+class _HDF5Writer(_ResultWriter):
+    def __init__(self, path):
+        super().__init__(path)
+        self.h5py = _import_optional("h5py", path)
+        if os.path.exists(path):
+            with self.h5py.File(path, "r") as h5_file:
+                self.runs = len(h5_file)
+
+    def _write(self, results):
+        with self.h5py.File(self.path, "a") as h5_file:
+            run = h5_file.create_group(f"run{self.runs}")
+            for query, (names, values) in _iter_columns(results):
+                group = run.create_group(query)
+                group.create_dataset("names", data=names.astype(object),
+                                     dtype=self.h5py.string_dtype())
+                group.create_dataset("values", data=values)
+
+
+class _ArrowWriter(_ResultWriter):
+    """Streams runs as rows (run, query, name, value) through an open pyarrow writer.
+
+    The file is only complete once the writer is closed, see PyGridSim.close_exports().
+    Closed files cannot be appended to, so an existing file is never overwritten.
+    """
+
+    writer = None
+
+    def __init__(self, path):
+        super().__init__(path)
+        if os.path.exists(path):
+            raise FileExistsError(f"Cannot stream results to {path}: the file exists, "
+                                  "remove it or export to a new path")
+        self.pa = _import_optional("pyarrow", path)
+        self.schema = self.pa.schema([("run", self.pa.int64()), ("query", self.pa.string()),
+                                      ("name", self.pa.string()), ("value", self.pa.float64())])
+        self.writer = self._open_writer()
+
+    def _write(self, results):
+        columns = list(_iter_columns(results))
+        if not columns:
+            return
+        sizes = [len(names) for _, (names, _) in columns]
+        table = self.pa.table({
+            "run": np.full(sum(sizes), self.runs, dtype=np.int64),
+            "query": np.repeat([query for query, _ in columns], sizes),
+            "name": np.concatenate([names for _, (names, _) in columns]),
+            "value": np.concatenate([values for _, (_, values) in columns]),
+        }, schema=self.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+class _ParquetWriter(_ArrowWriter):
+    def _open_writer(self):
+        import pyarrow.parquet as pq
+        return pq.ParquetWriter(self.path, self.schema)
+
+
+class _ArrowStreamWriter(_ArrowWriter):
+    def _open_writer(self):
+        return self.pa.ipc.new_file(self.path, self.schema)
+
+
+EXPORT_WRITERS = {
+    ".json": _JSONWriter,
+    ".jsonl": _JSONLinesWriter,
+    ".npz": _NPZWriter,
+    ".h5": _HDF5Writer,
+    ".hdf5": _HDF5Writer,
+    ".parquet": _ParquetWriter,
+    ".arrow": _ArrowStreamWriter,
+    ".feather": _ArrowStreamWriter,
+}
+
+
+def _import_optional(module, path):
+    try:
+        return importlib.import_module(module)
+    except ImportError:
+        raise ImportError(f"Exporting to {path} requires {module}, "
+                          "install it with 'pip install pygridsim[export]'")
+
+
+def _open_writer(path):
+    # any other extension, or none, is written as plain JSON
+    extension = os.path.splitext(path)[1].lower()
+    return EXPORT_WRITERS.get(extension, _JSONWriter)(path)
+
+
+def _export_results(results, path, writers):
+    if path not in writers:
+        writers[path] = _open_writer(path)
+    writers[path].write(results)
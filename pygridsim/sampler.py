@@ -0,0 +1,65 @@
+"""
+Seedable sampler used to draw component parameters from their default ranges
+"""
+import numpy as np
+
+
+class ParameterSampler:
+    def __init__(self, seed=None):
+        """Initialize a random stream for drawing parameters.
+
+        Every PyGridSim circuit owns one sampler, so circuits built with the same seed
+        and the same sequence of calls get exactly the same parameters.
+
+        Args:
+            seed (int | numpy.random.SeedSequence, optional):
+                Seed of the stream. Defaults to None, which seeds from fresh OS entropy.
+
+        Attributes:
+            seed_sequence (numpy.random.SeedSequence): Seed sequence the stream derives from.
+            rng (numpy.random.Generator): Generator used to draw values.
+        """
+        if isinstance(seed, np.random.SeedSequence):
+            self.seed_sequence = seed
+        else:
+            self.seed_sequence = np.random.SeedSequence(seed)
+        self.rng = np.random.default_rng(self.seed_sequence)
+
+    def sample(self, param_range, size=None):
+        """Draws values uniformly from a parameter range.
+
+        Args:
+            param_range (list[float] | float):
+                A [min, max] range to draw from, or a fixed value that is returned as is.
+            size (int, optional):
+                Number of values to draw in one vectorized call. Defaults to None,
+                which draws a single float.
+
+        Returns:
+            float | numpy.ndarray:
+                A single value, or an array of size values if size is given.
+        """
+        if type(param_range) is not list:
+            if size is None:
+                return param_range
+            return np.full(size, param_range, dtype=np.float64)
+
+        [min, max] = param_range
+        return self.rng.uniform(min, max, size)
+
+    def spawn(self, num):
+        """Creates independent child samplers.
+
+        Children are derived from this sampler's seed sequence, so the same seed always
+        spawns the same children, and their streams do not overlap with each other or
+        with this sampler. Used to hand reproducible streams to worker processes.
+
+        Args:
+            num (int):
+                Number of child samplers to create.
+
+        Returns:
+            list[ParameterSampler]:
+                The child samplers.
+        """
+        return [ParameterSampler(child) for child in self.seed_sequence.spawn(num)]
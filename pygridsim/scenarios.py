@@ -0,0 +1,234 @@
+"""
+Runs many randomized circuits (scenarios), or sweeps and hosting capacity searches of one
+circuit, across a pool of worker processes
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from pygridsim.core import PyGridSim, _new_context
+from pygridsim.sampler import ParameterSampler
+from pygridsim.sweeps import _grid_results, _grid_shape, _make_axes, _sweep_points
+
+DEFAULT_QUERIES = ["Voltages", "Losses"]
+
+# Engine context owned by the current worker process, reused by all of its scenarios
+_worker_dss = None
+
+
+def _init_worker():
+    global _worker_dss
+    _worker_dss = _new_context()
+
+
+def _run_scenario(builder, seed, queries, dss):
+    circuit = PyGridSim(seed=seed, dss=dss)
+    builder(circuit)
+    circuit.solve()
+    return circuit.results(queries)
+
+
+def _run_chunk(builder, chunk, queries):
+    # Workers stay alive between chunks and keep one engine context, so engine startup
+    # is paid once per process and every scenario only clears and rebuilds its circuit.
+    return [(index, _run_scenario(builder, seed, queries, _worker_dss)) for index, seed in chunk]
+
+
+def _make_chunks(seeds, chunksize):
+    indexed = list(enumerate(seeds))
+    return [indexed[i:i + chunksize] for i in range(0, len(indexed), chunksize)]
+
+
+def run_scenarios(builder,
+                  n: int,
+                  workers: int = None,
+                  queries: list[str] = None,
+                  seed: int = None,
+                  chunksize: int = None):
+    """Builds, solves and queries n randomized circuits in parallel.
+
+    Each scenario gets a fresh PyGridSim seeded from its own child stream of seed,
+    which is passed to builder to add components. Scenario results do not depend on
+    the number of workers or the chunking, so runs with a seed are fully reproducible.
+
+    Args:
+        builder (callable):
+            Function taking a PyGridSim and adding the scenario's components to it.
+            Must be picklable (e.g. defined at module level) when workers > 1.
+        n (int):
+            Number of scenarios to run.
+        workers (int, optional):
+            Number of worker processes. Defaults to the number of CPUs.
+            With 1 worker, scenarios run in the calling process.
+        queries (list[str], optional):
+            Queries passed to results() for every scenario. Defaults to ["Voltages", "Losses"].
+        seed (int, optional):
+            Seed that all scenario streams are spawned from. Defaults to None (unseeded).
+        chunksize (int, optional):
+            Number of scenarios sent to a worker at once.
+            Defaults to splitting the scenarios in about 4 chunks per worker.
+
+    Returns:
+        list[dict]:
+            The results of every scenario, in scenario order.
+    """
+    queries = queries or DEFAULT_QUERIES
+    workers = workers or os.cpu_count()
+    seeds = ParameterSampler(seed).seed_sequence.spawn(n)
+
+    if workers == 1:
+        dss = _new_context()
+        return [_run_scenario(builder, scenario_seed, queries, dss) for scenario_seed in seeds]
+
+    chunksize = chunksize or max(1, n // (workers * 4))
+    results = [None] * n
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        futures = [executor.submit(_run_chunk, builder, chunk, queries)
+                   for chunk in _make_chunks(seeds, chunksize)]
+        for future in as_completed(futures):
+            for index, result in future.result():
+                results[index] = result
+
+    return results
+
+
+def _run_sweep_chunk(builder, seed, axes, points, queries, dss=None):
+    circuit = PyGridSim(seed=seed, dss=dss)
+    builder(circuit)
+    return _sweep_points(circuit, axes, points, queries)
+
+
+def run_sweep(builder,
+              target,
+              param: str = None,
+              values: list = None,
+              queries: list[str] = None,
+              workers: int = None,
+              seed=None):
+    """Sweeps parameters of a circuit, splitting the grid across worker processes.
+
+    Every worker builds the circuit once with builder and the same seed, so all workers
+    start from an identical circuit, then mutates and re-solves it for its part of the grid.
+    See PyGridSim.sweep for the axes and the returned arrays.
+
+    Args:
+        builder (callable):
+            Function taking a PyGridSim and adding the circuit's components to it.
+            Must be picklable (e.g. defined at module level) when workers > 1.
+        target (str | list[tuple]):
+            Element to sweep, or a list of (target, param, values) axes.
+        param (str, optional):
+            Parameter of the element to sweep. Defaults to None (target lists the axes).
+        values (list, optional):
+            Values of the parameter. Defaults to None (target lists the axes).
+        queries (list[str], optional):
+            Queries collected at every point. Defaults to ["Voltages", "Losses"].
+        workers (int, optional):
+            Number of worker processes. Defaults to the number of CPUs.
+            With 1 worker, the sweep runs in the calling process.
+        seed (int, optional):
+            Seed of the circuit. Defaults to None, which draws one seed shared by all workers.
+
+    Returns:
+        dict:
+            The swept axes and the collected query results (see PyGridSim.sweep).
+    """
+    axes = _make_axes(target, param, values)
+    queries = queries or DEFAULT_QUERIES
+    workers = workers or os.cpu_count()
+    if seed is None:
+        seed = ParameterSampler().seed_sequence.entropy
+    shape = _grid_shape(axes)
+    points = np.arange(int(np.prod(shape)))
+
+    chunks = [chunk for chunk in np.array_split(points, workers) if len(chunk)]
+    if len(chunks) == 1:
+        parts = [_run_sweep_chunk(builder, seed, axes, points, queries)]
+    else:
+        with ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+            parts = list(executor.map(_run_sweep_chunk, [builder] * len(chunks),
+                                      [seed] * len(chunks), [axes] * len(chunks), chunks,
+                                      [queries] * len(chunks)))
+
+    return _grid_results(axes, parts)
+
+
+def _run_hosting_chunk(builder, seed, buses, chunk, num_chunks, options):
+    circuit = PyGridSim(seed=seed)
+    builder(circuit)
+    if buses is None:
+        # every worker lists the same load buses of the same circuit, and takes its share
+        buses = [name for name, info in circuit.node_index.items() if info.kind == "load"]
+        buses = np.array_split(np.asarray(buses, dtype=object), num_chunks)[chunk].tolist()
+    return circuit.hosting_capacity(buses, **options)
+
+
+def run_hosting_capacity(builder,
+                         buses: list[str] = None,
+                         v_min: float = 0.95,
+                         v_max: float = 1.05,
+                         loss_limit: float = None,
+                         max_kw: float = 1000,
+                         tolerance: float = 1,
+                         workers: int = None,
+                         seed=None):
+    """Finds the PV hosting capacity of load buses, splitting the buses across worker processes.
+
+    Every worker builds the circuit once with builder and the same seed, so all workers
+    start from an identical circuit, then bisects the capacity of its share of the buses.
+    See PyGridSim.hosting_capacity for the limits and the returned arrays.
+
+    Args:
+        builder (callable):
+            Function taking a PyGridSim and adding the circuit's components to it.
+            Must be picklable (e.g. defined at module level) when workers > 1.
+        buses (list[str], optional):
+            Internal names or nicknames of the candidate load buses.
+            Defaults to every load bus.
+        v_min (float, optional):
+            Lowest allowed voltage of any bus, per unit. Defaults to 0.95.
+        v_max (float, optional):
+            Highest allowed voltage of any bus, per unit. Defaults to 1.05.
+        loss_limit (float, optional):
+            Highest allowed active power loss, as a multiple of the losses without PV.
+            Defaults to None (no limit).
+        max_kw (float, optional):
+            Largest PV size tried at a bus. Defaults to 1000.
+        tolerance (float, optional):
+            Precision of the capacities in kW. Defaults to 1.
+        workers (int, optional):
+            Number of worker processes. Defaults to the number of CPUs.
+            With 1 worker, the buses are searched in the calling process.
+        seed (int, optional):
+            Seed of the circuit. Defaults to None, which draws one seed shared by all workers.
+
+    Returns:
+        dict:
+            "names", "nicknames" and "values" (capacity in kW) arrays aligned by bus,
+            in the order of buses (see PyGridSim.hosting_capacity).
+    """
+    options = {"v_min": v_min, "v_max": v_max, "loss_limit": loss_limit, "max_kw": max_kw,
+               "tolerance": tolerance}
+    workers = workers or os.cpu_count()
+    if seed is None:
+        seed = ParameterSampler().seed_sequence.entropy
+    if buses is not None:
+        buses = list(buses)
+        workers = max(1, min(workers, len(buses)))
+
+    if workers == 1:
+        return _run_hosting_chunk(builder, seed, buses, 0, 1, options)
+
+    chunks = range(workers)
+    if buses is None:
+        bus_chunks = [None] * workers
+    else:
+        bus_chunks = [part.tolist() for part in np.array_split(np.asarray(buses, dtype=object),
+                                                               workers)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        parts = list(executor.map(_run_hosting_chunk, [builder] * workers, [seed] * workers,
+                                  bus_chunks, chunks, [workers] * workers,
+                                  [options] * workers))
+
+    return {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
@@ -0,0 +1,492 @@
+"""
+Sharded scenario runs and sweeps: a coordinator splits the work into deterministic shards on
+a queue, workers on any node run them into per-shard files, and a merge step combines them
+
+A queue backend is any object with put(shard), get() (a shard, or None when empty),
+done(key) and requeue(timeout). DirectoryQueue keeps shards as files in a shared directory,
+and BrokerQueue talks to a ShardBroker over TCP.
+"""
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import deque
+from multiprocessing.connection import Client, Listener
+
+import numpy as np
+
+from pygridsim.core import _new_context
+from pygridsim.sampler import ParameterSampler
+from pygridsim.scenarios import _run_scenario, _run_sweep_chunk
+from pygridsim.sweeps import DEFAULT_QUERIES, _grid_results, _grid_shape, _make_axes
+
+MANIFEST_NAME = "manifest.pkl"
+AUTHKEY_BYTES = 32
+
+
+def _shard_path(output_dir, shard_id):
+    return os.path.join(output_dir, f"shard-{shard_id:06d}.pkl")
+
+
+def _dump(path, value):
+    # written next to the final path and renamed, so readers never see a partial file
+    part = f"{path}.{uuid.uuid4().hex}.part"
+    with open(part, "wb") as part_file:
+        pickle.dump(value, part_file)
+    os.replace(part, path)
+
+
+def _load(path):
+    with open(path, "rb") as shard_file:
+        return pickle.load(shard_file)
+
+
+def _read_records(path):
+    records = []
+    with open(path, "rb") as shard_file:
+        while True:
+            try:
+                records.append(pickle.load(shard_file))
+            except EOFError:
+                return records
+
+
+class DirectoryQueue:
+    def __init__(self, directory: str):
+        """Initialize a queue of shards kept as files in a directory, e.g. on a shared filesystem.
+
+        Pending shards are files in "pending", and a worker claims one by renaming it into
+        "claimed", which only one worker can do. Claimed shards of workers that died can be
+        put back with requeue().
+
+        Args:
+            directory (str):
+                Directory holding the queue. Created if it does not exist.
+
+        Attributes:
+            directory (str): Directory holding the queue.
+        """
+        self.directory = directory
+        self._pending = os.path.join(directory, "pending")
+        self._claimed = os.path.join(directory, "claimed")
+        os.makedirs(self._pending, exist_ok=True)
+        os.makedirs(self._claimed, exist_ok=True)
+
+    def put(self, shard: dict):
+        """Adds a shard to the queue.
+
+        Args:
+            shard (dict):
+                The shard, with a unique "key".
+
+        Returns:
+            None
+        """
+        _dump(os.path.join(self._pending, shard["key"]), shard)
+
+    def get(self):
+        """Claims the next pending shard.
+
+        Returns:
+            dict:
+                The shard, or None if no shard is pending.
+        """
+        for key in sorted(os.listdir(self._pending)):
+            if key.endswith(".part"):
+                continue
+            claimed = os.path.join(self._claimed, key)
+            try:
+                os.rename(os.path.join(self._pending, key), claimed)
+            except FileNotFoundError:
+                # claimed by another worker first
+                continue
+            # marks the claim time, for requeue()
+            os.utime(claimed)
+            return _load(claimed)
+        return None
+
+    def done(self, key: str):
+        """Removes a claimed shard whose results are written.
+
+        Args:
+            key (str):
+                Key of the shard.
+
+        Returns:
+            None
+        """
+        try:
+            os.remove(os.path.join(self._claimed, key))
+        except FileNotFoundError:
+            pass
+
+    def requeue(self, timeout: float = 0):
+        """Puts shards claimed longer ago than timeout back in the queue.
+
+        Args:
+            timeout (float, optional):
+                Seconds after which a claimed shard is considered lost. Defaults to 0 (all).
+
+        Returns:
+            int:
+                The number of shards put back.
+        """
+        now = time.time()
+        num = 0
+        for key in os.listdir(self._claimed):
+            claimed = os.path.join(self._claimed, key)
+            try:
+                if now - os.path.getmtime(claimed) >= timeout:
+                    os.rename(claimed, os.path.join(self._pending, key))
+                    num += 1
+            except FileNotFoundError:
+                pass
+        return num
+
+
+class ShardBroker:
+    def __init__(self, address: tuple = ("127.0.0.1", 0), authkey: bytes = None):
+        """Initialize a TCP broker holding a queue of shards in memory.
+
+        Serves BrokerQueue clients from background threads, which only pass shards around,
+        so the broker can run in the coordinator's process. Connections are authenticated
+        with authkey. Shards are pickled, including their builder functions, so anyone
+        holding the key can run code on the broker and its workers: keep it secret, and only
+        listen beyond localhost on trusted networks.
+
+        Args:
+            address (tuple, optional):
+                (host, port) to listen on. Defaults to a free port of 127.0.0.1.
+            authkey (bytes, optional):
+                Shared key of the broker and its clients. Defaults to a new random key.
+
+        Attributes:
+            address (tuple): (host, port) the broker listens on.
+            authkey (bytes): Shared key of the broker and its clients, to pass to BrokerQueue.
+        """
+        self.authkey = os.urandom(AUTHKEY_BYTES) if authkey is None else authkey
+        self._listener = Listener(address, authkey=self.authkey)
+        self.address = self._listener.address
+        self._pending = deque()
+        self._claimed = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._accept, daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _accept(self):
+        while True:
+            try:
+                connection = self._listener.accept()
+            except Exception:
+                # failed handshake, or the listener was closed
+                if self._closed:
+                    return
+                continue
+            if self._closed:
+                connection.close()
+                return
+            threading.Thread(target=self._serve, args=(connection,), daemon=True).start()
+
+    def _serve(self, connection):
+        with connection:
+            while True:
+                try:
+                    operation, argument = connection.recv()
+                except (EOFError, OSError):
+                    return
+                with self._lock:
+                    reply = self._handle(operation, argument)
+                connection.send(reply)
+
+    def _handle(self, operation, argument):
+        if operation == "put":
+            self._pending.append(argument)
+            return None
+        if operation == "get":
+            if not self._pending:
+                return None
+            shard = self._pending.popleft()
+            self._claimed[shard["key"]] = (shard, time.time())
+            return shard
+        if operation == "done":
+            self._claimed.pop(argument, None)
+            return None
+        if operation == "requeue":
+            now = time.time()
+            lost = [key for key, (_, claimed_at) in self._claimed.items()
+                    if now - claimed_at >= argument]
+            for key in lost:
+                self._pending.append(self._claimed.pop(key)[0])
+            return len(lost)
+        raise ValueError(f"Invalid broker operation {operation}")
+
+    def close(self):
+        """Stops accepting clients.
+
+        Returns:
+            None
+        """
+        if self._closed:
+            return
+        self._closed = True
+        # wakes up the blocked accept()
+        try:
+            Client(self.address, authkey=self.authkey).close()
+        except OSError:
+            pass
+        self._listener.close()
+        self._thread.join()
+
+
+class BrokerQueue:
+    def __init__(self, address: tuple, authkey: bytes):
+        """Initialize a client of the queue held by a ShardBroker.
+
+        Args:
+            address (tuple):
+                (host, port) of the broker.
+            authkey (bytes):
+                Shared key of the broker and its clients, see ShardBroker.authkey.
+        """
+        self._connection = Client(tuple(address), authkey=authkey)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _request(self, operation, argument=None):
+        self._connection.send((operation, argument))
+        return self._connection.recv()
+
+    def put(self, shard: dict):
+        """Adds a shard to the queue, see DirectoryQueue.put."""
+        self._request("put", shard)
+
+    def get(self):
+        """Claims the next pending shard, see DirectoryQueue.get."""
+        return self._request("get")
+
+    def done(self, key: str):
+        """Removes a claimed shard whose results are written, see DirectoryQueue.done."""
+        self._request("done", key)
+
+    def requeue(self, timeout: float = 0):
+        """Puts lost shards back in the queue, see DirectoryQueue.requeue."""
+        return self._request("requeue", timeout)
+
+    def close(self):
+        """Closes the connection to the broker.
+
+        Returns:
+            None
+        """
+        self._connection.close()
+
+
+def _submit(queue, output_dir, manifest, shards):
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    # shard files are named by position, so two runs in one directory would overwrite each other
+    if os.path.exists(manifest_path):
+        raise FileExistsError(f"Cannot submit to {output_dir}: it holds another run, "
+                              "remove it or submit to a new directory")
+    _dump(manifest_path, manifest)
+    # keys are unique across submissions, so jobs can share a queue
+    job = uuid.uuid4().hex[:12]
+    for shard_id, shard in enumerate(shards):
+        shard.update(key=f"{job}-{shard_id:06d}", id=shard_id, output_dir=output_dir)
+        queue.put(shard)
+    return len(shards)
+
+
+def submit_scenarios(queue,
+                     output_dir: str,
+                     builder,
+                     n: int,
+                     queries: list[str] = None,
+                     seed=None,
+                     shard_size: int = 100):
+    """Splits n randomized scenarios into shards of consecutive seeds, and queues them.
+
+    Scenario i is seeded from child i of seed's stream, as in run_scenarios, so the merged
+    results equal run_scenarios(builder, n, queries=queries, seed=seed) whatever the shard
+    size, the number of workers or the order shards run in.
+
+    Args:
+        queue (DirectoryQueue | BrokerQueue):
+            Queue the shards are put on.
+        output_dir (str):
+            Directory of the per-shard results, reachable by every worker.
+            Must not hold the results of another submitted run.
+        builder (callable):
+            Function taking a PyGridSim and adding the scenario's components to it.
+            Must be importable by every worker (e.g. defined at module level).
+        n (int):
+            Number of scenarios to run.
+        queries (list[str], optional):
+            Queries passed to results() for every scenario. Defaults to ["Voltages", "Losses"].
+        seed (int, optional):
+            Seed that all scenario streams are spawned from. Defaults to None, which draws one.
+        shard_size (int, optional):
+            Number of scenarios in a shard. Defaults to 100.
+
+    Returns:
+        int:
+            The number of shards queued.
+    """
+    if shard_size <= 0:
+        raise ValueError("Shard size must be positive")
+    queries = queries or DEFAULT_QUERIES
+    seed_sequence = ParameterSampler(seed).seed_sequence
+    shards = [{"kind": "scenarios", "builder": builder, "queries": queries,
+               "seed": seed_sequence, "start": start, "stop": min(start + shard_size, n)}
+              for start in range(0, n, shard_size)]
+    manifest = {"kind": "scenarios", "num_shards": len(shards), "n": n}
+    return _submit(queue, output_dir, manifest, shards)
+
+
+def submit_sweep(queue,
+                 output_dir: str,
+                 builder,
+                 target,
+                 param: str = None,
+                 values: list = None,
+                 queries: list[str] = None,
+                 seed=None,
+                 shard_size: int = 100):
+    """Splits the grid of a parameter sweep into shards of consecutive points, and queues them.
+
+    Every shard builds the circuit with builder and the same seed, as in run_sweep, so the
+    merged results equal run_sweep with the same arguments.
+
+    Args:
+        queue (DirectoryQueue | BrokerQueue):
+            Queue the shards are put on.
+        output_dir (str):
+            Directory of the per-shard results, reachable by every worker.
+            Must not hold the results of another submitted run.
+        builder (callable):
+            Function taking a PyGridSim and adding the circuit's components to it.
+            Must be importable by every worker (e.g. defined at module level).
+        target (str | list[tuple]):
+            Element to sweep, or a list of (target, param, values) axes.
+        param (str, optional):
+            Parameter of the element to sweep. Defaults to None (target lists the axes).
+        values (list, optional):
+            Values of the parameter. Defaults to None (target lists the axes).
+        queries (list[str], optional):
+            Queries collected at every point. Defaults to ["Voltages", "Losses"].
+        seed (int, optional):
+            Seed of the circuit. Defaults to None, which draws one seed shared by all shards.
+        shard_size (int, optional):
+            Number of grid points in a shard. Defaults to 100.
+
+    Returns:
+        int:
+            The number of shards queued.
+    """
+    if shard_size <= 0:
+        raise ValueError("Shard size must be positive")
+    axes = _make_axes(target, param, values)
+    queries = queries or DEFAULT_QUERIES
+    if seed is None:
+        seed = ParameterSampler().seed_sequence.entropy
+    num_points = int(np.prod(_grid_shape(axes)))
+    shards = [{"kind": "sweep", "builder": builder, "queries": queries, "seed": seed,
+               "axes": axes, "start": start, "stop": min(start + shard_size, num_points)}
+              for start in range(0, num_points, shard_size)]
+    manifest = {"kind": "sweep", "num_shards": len(shards), "axes": axes}
+    return _submit(queue, output_dir, manifest, shards)
+
+
+def _run_shard(shard, dss):
+    path = _shard_path(shard["output_dir"], shard["id"])
+    # results are appended as they complete, under a name unique to this run of the shard
+    part = f"{path}.{uuid.uuid4().hex}.part"
+    with open(part, "wb") as part_file:
+        if shard["kind"] == "scenarios":
+            root = shard["seed"]
+            for index in range(shard["start"], shard["stop"]):
+                # the same child seed run_scenarios spawns for scenario index
+                seed = np.random.SeedSequence(root.entropy, spawn_key=root.spawn_key + (index,),
+                                              pool_size=root.pool_size)
+                result = _run_scenario(shard["builder"], seed, shard["queries"], dss)
+                pickle.dump((index, result), part_file)
+                part_file.flush()
+        else:
+            points = np.arange(shard["start"], shard["stop"])
+            part_result = _run_sweep_chunk(shard["builder"], shard["seed"], shard["axes"],
+                                           points, shard["queries"], dss)
+            pickle.dump((shard["start"], part_result), part_file)
+    os.replace(part, path)
+
+
+def run_worker(queue, max_shards: int = None):
+    """Runs shards from a queue until it is empty, writing each to its results file.
+
+    Workers can run on any node that reaches the queue and the shards' output directory.
+    A shard is marked done only after its results file is complete, so shards of a
+    worker that dies can be requeued and run again.
+
+    Args:
+        queue (DirectoryQueue | BrokerQueue):
+            Queue the shards are taken from.
+        max_shards (int, optional):
+            Number of shards after which to stop. Defaults to None (until the queue is empty).
+
+    Returns:
+        int:
+            The number of shards run.
+    """
+    dss = None
+    num = 0
+    while max_shards is None or num < max_shards:
+        shard = queue.get()
+        if shard is None:
+            break
+        if dss is None:
+            # one engine context for every shard this worker runs
+            dss = _new_context()
+        _run_shard(shard, dss)
+        queue.done(shard["key"])
+        num += 1
+    return num
+
+
+def merge_shards(output_dir: str):
+    """Combines the per-shard results of a submitted run.
+
+    Args:
+        output_dir (str):
+            Directory of the per-shard results, as passed when submitting.
+
+    Returns:
+        list[dict] | dict:
+            For scenarios, the results of every scenario in scenario order, as returned by
+            run_scenarios. For sweeps, the swept axes and the collected query results, as
+            returned by run_sweep.
+    """
+    manifest = _load(os.path.join(output_dir, MANIFEST_NAME))
+    paths = [_shard_path(output_dir, shard_id) for shard_id in range(manifest["num_shards"])]
+    missing = [shard_id for shard_id, path in enumerate(paths) if not os.path.exists(path)]
+    if missing:
+        raise ValueError(f"Missing results of shards {missing}")
+
+    records = [record for path in paths for record in _read_records(path)]
+    if manifest["kind"] == "scenarios":
+        results = [None] * manifest["n"]
+        for index, result in records:
+            results[index] = result
+        return results
+    # one record per sweep shard, already in grid order
+    return _grid_results(manifest["axes"], [part for _, part in records])
@@ -0,0 +1,132 @@
+"""
+Helper functions to compile declarative circuit specs into one OpenDSS command script
+"""
+import json
+import os
+
+import numpy as np
+
+import pygridsim.configs as configs
+import pygridsim.defaults as defaults
+from pygridsim.enums import GeneratorType, LoadType, SourceType
+from pygridsim.parameters import (
+    NodeInfo, _check_valid_params, _command, _get_batch_param, _get_enum_obj, _get_param,
+    _make_names,)
+
+# sections of a spec, compiled in this order (the order of the equivalent add_* calls)
+SPEC_SECTIONS = ["source", "loads", "generators", "pv", "lines"]
+
+
+def _read_spec(spec):
+    if isinstance(spec, dict):
+        return spec
+
+    extension = os.path.splitext(spec)[1].lower()
+    with open(spec, encoding='utf-8') as spec_file:
+        if extension == ".json":
+            return json.load(spec_file)
+        if extension in [".yaml", ".yml"]:
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError(f"Reading {spec} requires pyyaml, "
+                                  "install it with 'pip install pygridsim[spec]'")
+            return yaml.safe_load(spec_file)
+
+    raise ValueError(f"Unsupported spec format {extension}: expect one of .json, .yaml, .yml")
+
+
+def _check_spec(spec):
+    for section in spec:
+        if section not in SPEC_SECTIONS:
+            raise KeyError(
+                f"Spec section {section} is not supported, expect one of {SPEC_SECTIONS}")
+
+
+def _per_element(values, num):
+    return np.broadcast_to(values, num)
+
+
+def _compile_loadshapes(dss, load_type_obj, compiled):
+    # mirrors _get_loadshapes: shapes already in the engine or script are left alone
+    commands = []
+    daily, yearly = load_type_obj.value, load_type_obj.value + "_yearly"
+    for name in [daily, yearly]:
+        if name not in dss.LoadShape and name not in compiled:
+            mult = configs.LOADSHAPE_CONFIGURATIONS[load_type_obj]
+            commands.append(_command("new", "loadshape." + name, npts=len(mult),
+                                     interval=defaults.LOADSHAPE_INTERVAL, mult=mult))
+            compiled.add(name)
+    return commands, daily, yearly
+
+
+def _compile_source(source_params, source_type, sampler):
+    _check_valid_params(source_params, defaults.VALID_SOURCE_PARAMS)
+    source_type_obj = _get_enum_obj(SourceType, source_type)
+
+    source_type_param = configs.SOURCE_CONFIGURATIONS[source_type_obj]["kV"]
+    kv = _get_param(source_params, "kV", sampler.sample(source_type_param))
+    phases = _get_param(source_params, "phases", defaults.PHASES)
+    impedances = {imp: _get_param(source_params, imp, defaults.IMPEDANCE)
+                  for imp in defaults.IMPEDANCE_PARAMS}
+    command = _command("edit", "vsource.source",
+                       bus1="source",
+                       phases=phases,
+                       basekv=kv,
+                       frequency=_get_param(source_params, "frequency", defaults.FREQUENCY),
+                       **impedances)
+    return [command], NodeInfo("source", float(kv), int(phases))
+
+
+def _compile_loads(dss, load_params, load_type, start, num, sampler, loadshapes):
+    _check_valid_params(load_params, defaults.VALID_LOAD_PARAMS)
+    load_type_obj = _get_enum_obj(LoadType, load_type)
+    commands, daily, yearly = _compile_loadshapes(dss, load_type_obj, loadshapes)
+
+    names = _make_names('load', start, num)
+    properties = {}
+    for attr in ["kV", "kW", "kvar"]:
+        load_type_param = configs.LOAD_CONFIGURATIONS[load_type_obj][attr]
+        properties[attr] = _per_element(
+            _get_batch_param(load_params, attr, load_type_param, num, sampler), num)
+    phases = _get_param(load_params, "phases", defaults.PHASES)
+
+    for i, name in enumerate(names):
+        commands.append(_command("new", "load." + name, bus1=name, phases=phases,
+                                 kV=properties["kV"][i], kW=properties["kW"][i],
+                                 kvar=properties["kvar"][i], daily=daily, yearly=yearly))
+    return commands, {name: NodeInfo("load", float(kv), int(phases))
+                      for name, kv in zip(names, properties["kV"])}
+
+
+def _compile_generators(params, gen_type, start, num, sampler):
+    _check_valid_params(params, defaults.VALID_GENERATOR_PARAMS)
+    gen_type_obj = _get_enum_obj(GeneratorType, gen_type)
+
+    names = _make_names('generator', start, num)
+    properties = {}
+    for attr in ["kV", "kW"]:
+        gen_type_param = configs.GENERATOR_CONFIGURATIONS[gen_type_obj][attr]
+        properties[attr] = _per_element(
+            _get_batch_param(params, attr, gen_type_param, num, sampler), num)
+    phases = _get_param(params, "phases", defaults.PHASES)
+
+    commands = [_command("new", "generator." + name, bus1=name, phases=phases,
+                         kV=properties["kV"][i], kW=properties["kW"][i])
+                for i, name in enumerate(names)]
+    return commands, {name: NodeInfo("generator", float(kv), int(phases))
+                      for name, kv in zip(names, properties["kV"])}
+
+
+def _compile_pvs(load_nodes, params, num_panels, start, sampler):
+    _check_valid_params(params, defaults.VALID_PV_PARAMS)
+    num = len(load_nodes)
+    if "kV" in params:
+        kv = params["kV"]
+    else:
+        kv = sampler.sample(defaults.SOLAR_PANEL_BASE_KV, num) * num_panels
+    kv = _per_element(kv, num)
+    phases = _get_param(params, "phases", defaults.PHASES)
+
+    return [_command("new", "pvsystem." + name, bus1=load, phases=phases, kV=kv[i])
+            for i, (name, load) in enumerate(zip(_make_names('pv', start, num), load_nodes))]
@@ -0,0 +1,80 @@
+"""
+Parameter sweeps that mutate one built circuit across a grid of values
+"""
+import numpy as np
+
+DEFAULT_QUERIES = ["Voltages", "Losses"]
+
+
+def _make_axes(target, param, values):
+    # one (target, param, values) axis, or a list of them for a multi-dimensional grid
+    axes = [(target, param, values)] if param is not None else list(target)
+    if not axes:
+        raise ValueError("Need at least one axis to sweep")
+    axes = [(axis_target, axis_param, np.asarray(axis_values).tolist())
+            for axis_target, axis_param, axis_values in axes]
+    if any(len(axis_values) == 0 for _, _, axis_values in axes):
+        raise ValueError("Every swept parameter needs at least one value")
+    return axes
+
+
+def _grid_shape(axes):
+    return tuple(len(values) for _, _, values in axes)
+
+
+def _is_label(value):
+    # names (and invalid query markers) are the same at every point, so they are kept
+    # once instead of stacked
+    return isinstance(value, str) or (isinstance(value, np.ndarray) and value.dtype.kind == "U")
+
+
+def _allocate(result, num):
+    if isinstance(result, dict):
+        return {key: _allocate(value, num) for key, value in result.items()}
+    if _is_label(result):
+        return result
+    return np.empty((num,) + np.shape(result), dtype=np.float64)
+
+
+def _store(arrays, result, index):
+    for key, value in result.items():
+        if isinstance(value, dict):
+            _store(arrays[key], value, index)
+        elif not _is_label(value):
+            arrays[key][index] = value
+
+
+def _join(parts, shape):
+    # concatenates per-chunk arrays along the points axis and reshapes them to the grid
+    first = parts[0]
+    if isinstance(first, dict):
+        return {key: _join([part[key] for part in parts], shape) for key in first}
+    if _is_label(first):
+        return first
+    joined = np.concatenate(parts)
+    return joined.reshape(shape + joined.shape[1:])
+
+
+def _grid_results(axes, parts):
+    results = {"Grid": [(target, param, np.asarray(values)) for target, param, values in axes]}
+    results.update(_join(parts, _grid_shape(axes)))
+    return results
+
+
+def _sweep_points(circuit, axes, points, queries):
+    shape = _grid_shape(axes)
+    arrays = None
+    current = [None] * len(axes)
+    for i, point in enumerate(points):
+        for axis, value_index in enumerate(np.unravel_index(point, shape)):
+            # outer axes only change every few points, skip setting them again
+            if current[axis] != value_index:
+                target, param, values = axes[axis]
+                circuit._update_target(target, {param: values[value_index]})
+                current[axis] = value_index
+        circuit.solve()
+        result = circuit.results(queries, as_arrays=True)
+        if arrays is None:
+            arrays = _allocate(result, len(points))
+        _store(arrays, result, i)
+    return arrays
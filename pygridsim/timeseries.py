@@ -0,0 +1,71 @@
+"""
+Helpers to run quasi-static time-series simulations driven by load shapes
+"""
+import numpy as np
+
+import pygridsim.defaults as defaults
+
+SOLVE_MODES = {"daily": "Daily", "yearly": "Yearly"}
+
+# monitor modes: 96 = magnitude (+32) of the average of all phases (+64), 9 = element losses
+VOLTAGE_MONITOR_MODE = 96
+LOSSES_MONITOR_MODE = 9
+
+
+def _add_monitors(dss, elements, mode):
+    names = ["ts_" + element.split(".", 1)[1] for element in elements]
+    existing = set(dss.Monitor.Name)
+    missing = [(name, element) for name, element in zip(names, elements) if name not in existing]
+    if missing:
+        new_names, new_elements = zip(*missing)
+        dss.Monitor.batch_new(list(new_names), Element=list(new_elements), Terminal=1, Mode=mode)
+
+    return names
+
+
+def _run_timeseries(dss, mode, steps, step_hours):
+    # the engine is already loaded once a circuit is solved
+    from dss.enums import SolveModes
+
+    if mode not in SOLVE_MODES:
+        raise ValueError(f"Invalid time-series mode: expect one of {list(SOLVE_MODES)}")
+    steps = steps or defaults.TIMESERIES_STEPS[mode]
+
+    # Monitors record every step while the engine loops over the whole period,
+    # so Python is only involved before and after the run.
+    bus_elements = ["Vsource.source"] + dss.Load.FullName() + dss.Generator.FullName()
+    voltage_monitors = _add_monitors(dss, bus_elements, VOLTAGE_MONITOR_MODE)
+    loss_monitors = _add_monitors(dss, dss.PDElement.FullName(), LOSSES_MONITOR_MODE)
+    dss.Monitor.Enabled = True
+    dss.Monitor.Reset()
+
+    solution = dss.Solution
+    solution.Mode = SolveModes[SOLVE_MODES[mode]]
+    solution.Hour = 0
+    solution.Seconds = 0
+    solution.StepsizeHr = step_hours
+    solution.Number = steps
+    try:
+        solution.Solve()
+        return _read_monitors(dss, steps, bus_elements, voltage_monitors, loss_monitors)
+    finally:
+        # disabled monitors do not sample, so later snapshot solves stay as fast as before
+        solution.Mode = SolveModes.SnapShot
+        solution.Number = 1
+        dss.Monitor.Enabled = False
+
+
+def _read_monitors(dss, steps, bus_elements, voltage_monitors, loss_monitors):
+    voltages = np.empty((steps, len(voltage_monitors)), dtype=np.float64)
+    for column, name in enumerate(voltage_monitors):
+        voltages[:, column] = dss.Monitor[name].AsMatrix()[:steps, 2]
+
+    losses = np.zeros((steps, 2), dtype=np.float64)
+    for name in loss_monitors:
+        losses += dss.Monitor[name].AsMatrix()[:steps, 2:4]
+
+    samples = dss.Monitor[voltage_monitors[0]].AsMatrix()[:steps]
+    hours = samples[:, 0] + samples[:, 1] / 3600
+    bus_names = [element.split(".", 1)[1] for element in bus_elements]
+
+    return hours, bus_names, voltages, losses
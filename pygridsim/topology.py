@@ -0,0 +1,226 @@
+"""
+Graph index of the circuit's buses and lines, for checks and queries without the engine
+"""
+import numpy as np
+
+
+def _neighbors(indptr, indices, frontier):
+    # concatenated adjacency lists of every node in the frontier, in one vectorized step
+    starts = indptr[frontier]
+    counts = indptr[frontier + 1] - starts
+    offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+    return indices[offsets + np.arange(counts.sum())]
+
+
+def _csr(rows, cols, num):
+    order = np.argsort(rows, kind="stable")
+    indptr = np.zeros(num + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=num), out=indptr[1:])
+    return indptr, cols[order]
+
+
+class TopologyIndex:
+    def __init__(self):
+        """Initialize an empty graph of buses (nodes) and lines (edges).
+
+        Edges are appended as lines are added, and compressed sparse row (CSR) adjacency
+        arrays are rebuilt lazily on the first query after a change. Every check runs in
+        O(V + E) with vectorized breadth-first searches.
+
+        Attributes:
+            names (list[str]): Node names, in the order nodes were added.
+            node_ids (dict[str, int]): Map from node names to their position in names.
+        """
+        self.names = []
+        self.node_ids = {}
+        self._src = []
+        self._dst = []
+        self._adjacency = None
+        self._labels = None
+        self._trees = {}
+
+    @property
+    def num_nodes(self):
+        return len(self.names)
+
+    @property
+    def num_edges(self):
+        return sum(len(src) for src in self._src)
+
+    def _invalidate(self):
+        self._adjacency = None
+        self._labels = None
+        self._trees = {}
+
+    def add_nodes(self, names: list[str]):
+        """Adds nodes to the graph, ignoring the ones already in it.
+
+        Args:
+            names (list[str]):
+                Names of the nodes.
+
+        Returns:
+            numpy.ndarray:
+                Ids of the nodes.
+        """
+        node_ids = self.node_ids
+        new_names = [name for name in dict.fromkeys(names) if name not in node_ids]
+        if new_names:
+            node_ids.update(zip(new_names, range(self.num_nodes, self.num_nodes + len(new_names))))
+            self.names.extend(new_names)
+            self._invalidate()
+        return np.fromiter((node_ids[name] for name in names), dtype=np.int64, count=len(names))
+
+    def add_edges(self, connections: list[tuple]):
+        """Adds undirected edges to the graph, adding missing endpoints as nodes.
+
+        Args:
+            connections (list[tuple]):
+                The (src, dst) pairs of node names to connect.
+
+        Returns:
+            None
+        """
+        if len(connections) == 0:
+            return
+        src, dst = zip(*connections)
+        self._src.append(self.add_nodes(src))
+        self._dst.append(self.add_nodes(dst))
+        self._invalidate()
+
+    def _get_adjacency(self):
+        if self._adjacency is None:
+            num = self.num_nodes
+            src = np.concatenate(self._src) if self._src else np.zeros(0, dtype=np.int64)
+            dst = np.concatenate(self._dst) if self._dst else np.zeros(0, dtype=np.int64)
+            self._adjacency = _csr(np.concatenate([src, dst]), np.concatenate([dst, src]), num)
+        return self._adjacency
+
+    def _get_id(self, name):
+        if name not in self.node_ids:
+            raise KeyError(f"Invalid node name {name}")
+        return self.node_ids[name]
+
+    def _bfs(self, start, indptr, indices):
+        # level by level search, returns the parent of every reached node (-1 if unreached)
+        parents = np.full(len(indptr) - 1, -1, dtype=np.int64)
+        parents[start] = start
+        frontier = np.array([start], dtype=np.int64)
+        while len(frontier):
+            counts = indptr[frontier + 1] - indptr[frontier]
+            neighbors = _neighbors(indptr, indices, frontier)
+            sources = np.repeat(frontier, counts)
+            new = parents[neighbors] == -1
+            neighbors, sources = neighbors[new], sources[new]
+            # the first edge found to every new node becomes its parent
+            neighbors, first = np.unique(neighbors, return_index=True)
+            parents[neighbors] = sources[first]
+            frontier = neighbors
+        return parents
+
+    def components(self):
+        """Labels the connected components of the graph.
+
+        Returns:
+            numpy.ndarray:
+                Component label of every node, numbered in the order of their first node.
+        """
+        if self._labels is None:
+            indptr, indices = self._get_adjacency()
+            labels = np.full(self.num_nodes, -1, dtype=np.int64)
+            # nodes without lines are their own component, no search needed
+            isolated = np.flatnonzero(np.diff(indptr) == 0)
+            labels[isolated] = isolated
+            for node in range(self.num_nodes):
+                if labels[node] == -1:
+                    labels[self._bfs(node, indptr, indices) != -1] = node
+            self._labels = np.unique(labels, return_inverse=True)[1].reshape(-1)
+        return self._labels
+
+    def num_components(self):
+        return int(self.components().max()) + 1 if self.num_nodes else 0
+
+    def unreachable(self, root: str = "source"):
+        """Lists the nodes that no path of lines connects to a root node.
+
+        Args:
+            root (str, optional):
+                Name of the root node. Defaults to "source".
+
+        Returns:
+            list[str]:
+                Names of the unreachable nodes.
+        """
+        labels = self.components()
+        unreachable = np.flatnonzero(labels != labels[self._get_id(root)])
+        return [self.names[node] for node in unreachable]
+
+    def islands(self, root: str = "source"):
+        """Groups the nodes that are not connected to a root node into islands.
+
+        Args:
+            root (str, optional):
+                Name of the root node. Defaults to "source".
+
+        Returns:
+            list[list[str]]:
+                Names of the nodes of every island.
+        """
+        labels = self.components()
+        root_label = labels[self._get_id(root)]
+        order = np.argsort(labels, kind="stable")
+        bounds = np.flatnonzero(np.diff(labels[order])) + 1
+        return [[self.names[node] for node in group]
+                for group in np.split(order, bounds) if labels[group[0]] != root_label]
+
+    def num_cycles(self):
+        """Counts the independent cycles (meshes) of the graph, E - V + C.
+
+        Parallel lines between the same two nodes count as a cycle.
+
+        Returns:
+            int:
+                Number of independent cycles.
+        """
+        return self.num_edges - self.num_nodes + self.num_components()
+
+    def is_radial(self):
+        """Checks whether the graph is a single tree, i.e. connected and without cycles.
+
+        Returns:
+            bool:
+                Whether the graph is radial.
+        """
+        return self.num_components() <= 1 and self.num_cycles() == 0
+
+    def _get_tree(self, root):
+        if root not in self._trees:
+            indptr, indices = self._get_adjacency()
+            parents = self._bfs(root, indptr, indices)
+            children = np.flatnonzero((parents != -1) & (parents != np.arange(len(parents))))
+            self._trees[root] = _csr(parents[children], children, self.num_nodes)
+        return self._trees[root]
+
+    def downstream(self, node: str, root: str = "source"):
+        """Lists the nodes fed through a node, seen from a root node.
+
+        Uses the breadth-first tree from the root, so in meshed graphs every node is
+        downstream of the node on its shortest path (in lines) from the root.
+
+        Args:
+            node (str):
+                Name of the node.
+            root (str, optional):
+                Name of the root node. Defaults to "source".
+
+        Returns:
+            list[str]:
+                Names of the downstream nodes, nearest first, excluding the node itself.
+        """
+        indptr, indices = self._get_tree(self._get_id(root))
+        frontier = np.array([self._get_id(node)], dtype=np.int64)
+        levels = []
+        while len(frontier):
+            frontier = _neighbors(indptr, indices, frontier)
+            levels.append(frontier)
+        return [self.names[child] for child in np.concatenate(levels)]
@@ -12,7 +12,17 @@ with open('HISTORY.md', encoding='utf-8') as history_file:
     history = history_file.read()
 
 install_requires = [
-    'altdss>=0.2.4'
+    'altdss>=0.2.4',
+    'numpy>=1.17',
+]
+
+export_requires = [
+    'h5py>=3.0',
+    'pyarrow>=8.0',
+]
+
+spec_requires = [
+    'pyyaml>=5.1',
 ]
 
 setup_requires = [
@@ -73,6 +83,8 @@ setup(
     ],
     description='Package to simulate OpenDSS circuits on Python',
     extras_require={
+        'export': export_requires,
+        'spec': spec_requires,
         'test': tests_require,
         'dev': development_requires + tests_require,
     },
@@ -1,13 +1,45 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
+import asyncio
+import gc
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
 import unittest
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import AuthenticationError
+from unittest import mock
 
-from pygridsim.core import PyGridSim
+import numpy as np
+
+from pygridsim.aio import AsyncPyGridSim
+from pygridsim.cache import CircuitCache
+from pygridsim.core import PyGridSim, _new_context
 from pygridsim.enums import GeneratorType, LineType, LoadType, SourceType
+from pygridsim.feeders import generate_feeder
+from pygridsim.instrumentation import Profiler
+from pygridsim.model import CircuitModel
+from pygridsim.names import NameRegistry
+from pygridsim.sampler import ParameterSampler
+from pygridsim.scenarios import run_hosting_capacity, run_scenarios, run_sweep
+from pygridsim.sharding import (
+    BrokerQueue, DirectoryQueue, ShardBroker, merge_shards, run_worker, submit_scenarios,
+    submit_sweep,)
+from pygridsim.topology import TopologyIndex
 
 """Tests for `pygridsim` package."""
 
 
+def _build_scenario(circuit):
+    circuit.update_source()
+    circuit.add_load_nodes(num=3)
+    circuit.add_lines([("source", "load0"), ("load0", "load1"), ("source", "load2")])
+
+
 class TestDefaultRangeCircuit(unittest.TestCase):
     """
     All of these tests work with default range circuits (i.e. enum inputs)
@@ -206,6 +238,842 @@ class TestDefaultRangeCircuit(unittest.TestCase):
         queries += ["realpowerloss", "reactive Loss", "Active Power", "reactivepower"]
         print(circuit.results(queries))
 
+    def test_014_batch_creation(self):
+        circuit = PyGridSim()
+        circuit.update_source()
+        loads = circuit.add_load_nodes(num=100, load_type="commercial", names=["first"])
+        generators = circuit.add_generators(num=50, gen_type="large")
+        pvs = circuit.add_PVSystems(load_nodes=["first", "load99"], num_panels=2)
+        self.assertEqual((len(loads), len(generators), len(pvs)), (100, 50, 2))
+        self.assertEqual(circuit.num_loads, 100)
+        # each element draws its own parameters from the type's range
+        self.assertTrue(all(0.24 <= kv <= 0.48 for kv in loads.kV))
+        self.assertGreater(len(set(loads.kW)), 1)
+        self.assertEqual(list(pvs.Bus1), ["load0", "load99"])
+        circuit.add_lines([("source", "load0"), ("generator0", "load99")])
+        circuit.solve()
+
+        # a failed batch leaves no nickname pointing at a missing element
+        with self.assertRaises(TypeError):
+            circuit.add_load_nodes(num=1, names=["broken"], params={"kV": "high"})
+        with self.assertRaises(TypeError):
+            circuit.add_generators(num=1, names=["broken"], params={"kV": "high"})
+        self.assertNotIn("broken", circuit.nickname_to_name)
+        self.assertEqual((circuit.num_loads, circuit.num_generators), (100, 50))
+        circuit.clear()
+
+    def test_015_seeded_circuits(self):
+        def build(seed):
+            circuit = PyGridSim(seed=seed)
+            circuit.update_source(source_type="turbine")
+            circuit.add_load_nodes(num=5, load_type="house")
+            circuit.add_generators(num=2, gen_type="small")
+            circuit.add_PVSystems(load_nodes=["load1"])
+            circuit.add_lines([("source", "load0"), ("load0", "load1"), ("generator0", "load1")])
+            circuit.solve()
+            return circuit.results(["Voltages", "Losses"])
+
+        # same seed reproduces the circuit exactly, a different seed does not
+        self.assertEqual(build(7), build(7))
+        self.assertNotEqual(build(7)["Voltages"], build(8)["Voltages"])
+
+    def test_016_sampler(self):
+        sampler = ParameterSampler(seed=3)
+        values = sampler.sample([2, 5], 1000)
+        self.assertEqual(values.shape, (1000,))
+        self.assertTrue(((values >= 2) & (values <= 5)).all())
+        # fixed values pass through, or are repeated for a batch
+        self.assertEqual(sampler.sample(4), 4)
+        self.assertEqual(list(sampler.sample(4, 3)), [4, 4, 4])
+
+        # children are reproducible from the parent seed and independent of each other
+        children = ParameterSampler(seed=3).spawn(2)
+        same_children = ParameterSampler(seed=3).spawn(2)
+        first, second = (child.sample([0, 1], 10) for child in children)
+        self.assertEqual(list(first), list(same_children[0].sample([0, 1], 10)))
+        self.assertNotEqual(list(first), list(second))
+
+    def test_017_run_scenarios(self):
+        results = run_scenarios(_build_scenario, 6, workers=2, seed=11, chunksize=2)
+        self.assertEqual(len(results), 6)
+        self.assertEqual(set(results[0]), {"Voltages", "Losses"})
+        # scenarios differ from each other, but not from a serial run with the same seed
+        self.assertNotEqual(results[0], results[1])
+        self.assertEqual(results, run_scenarios(_build_scenario, 6, workers=1, seed=11))
+
+    def test_018_coexisting_circuits(self):
+        # each circuit owns its engine context, so creating one does not clear the other
+        first = PyGridSim()
+        first.update_source(params={"kV": 10})
+        first.add_load_nodes(num=2, params={"kV": 5, "kW": 10, "kvar": 2})
+        first.add_lines([("source", "load0"), ("source", "load1")], params={"length": 2})
+
+        second = PyGridSim()
+        second.update_source(params={"kV": 20})
+        second.add_load_nodes(num=1, params={"kV": 1, "kW": 10, "kvar": 2})
+        second.add_lines([("source", "load0")], params={"length": 2})
+
+        first.solve()
+        second.solve()
+        first_voltages = first.results(["Voltages"])["Voltages"]
+        second_voltages = second.results(["Voltages"])["Voltages"]
+        self.assertEqual(set(first_voltages), {"source", "load0", "load1"})
+        self.assertEqual(set(second_voltages), {"source", "load0"})
+        self.assertNotEqual(first_voltages["source"], second_voltages["source"])
+
+        # circuits are built, solved and queried concurrently from a thread pool, and each
+        # matches the same circuit run serially
+        def run(seed):
+            circuit = PyGridSim(seed=seed)
+            _build_scenario(circuit)
+            circuit.add_load_nodes(num=seed)
+            circuit.solve()
+            return circuit.results(["Voltages", "Losses", "LinePowers"], as_arrays=True)
+
+        seeds = list(range(1, 9))
+        serial = [run(seed) for seed in seeds]
+        for _ in range(3):
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                threaded = list(executor.map(run, seeds))
+            for expected, result in zip(serial, threaded):
+                np.testing.assert_array_equal(result["Voltages"]["values"],
+                                              expected["Voltages"]["values"])
+                self.assertEqual(result["Losses"], expected["Losses"])
+                np.testing.assert_array_equal(result["LinePowers"]["Active Power"],
+                                              expected["LinePowers"]["Active Power"])
+
+    def test_019_cached_results(self):
+        circuit = PyGridSim()
+        circuit.update_source()
+        circuit.add_load_nodes(num=2, names=["home"])
+        circuit.add_lines([("source", "home"), ("source", "load1")])
+        circuit.solve()
+
+        # spies on the engine calls behind the queries, counting calls of every context
+        engine = type(circuit.dss)
+        calls = ["Losses", "TotalPower", "BusNames", "BusVMag"]
+        patches = [mock.patch.object(engine, call, autospec=True,
+                                     side_effect=getattr(engine, call)) for call in calls]
+        spies = dict(zip(calls, [patch.start() for patch in patches]))
+        self.addCleanup(mock.patch.stopall)
+
+        results = circuit.results(["Voltages", "Losses", "RealLoss"])
+        self.assertIn("load0/home", results["Voltages"])
+        # only the quantities needed by the queries were fetched, once each
+        counts = {call: spy.call_count for call, spy in spies.items()}
+        self.assertEqual(counts, {"Losses": 1, "TotalPower": 0, "BusNames": 1, "BusVMag": 1})
+        # the same solution is served again without any engine call
+        self.assertEqual(results, circuit.results(["Voltages", "Losses", "RealLoss"]))
+        self.assertEqual({call: spy.call_count for call, spy in spies.items()}, counts)
+
+        # solving again discards the cached quantities
+        circuit.update_source(params={"kV": 2})
+        circuit.solve()
+        self.assertNotEqual(results["Voltages"], circuit.results(["Voltages"])["Voltages"])
+        self.assertEqual(spies["BusVMag"].call_count, 2)
+
+        # editing the circuit discards them too, so no query mixes two states of the circuit
+        self.assertEqual(len(circuit.results(["LoadPowers"])["LoadPowers"]["names"]), 2)
+        circuit.add_load_nodes()
+        self.assertEqual(len(circuit.results(["LoadPowers"])["LoadPowers"]["names"]), 3)
+        circuit.update_load("load2", {"kW": 3})
+        circuit.results(["Voltages"])
+        self.assertEqual(spies["BusVMag"].call_count, 3)
+
+    def test_020_array_results(self):
+        circuit = PyGridSim()
+        circuit.update_source()
+        circuit.add_load_nodes(num=3, names=["home"])
+        circuit.add_lines([("source", "home"), ("home", "load1"), ("source", "load2")])
+        circuit.solve()
+        voltages = circuit.results(["Voltages"])["Voltages"]
+        columns = circuit.results(["Voltages", "Losses"], as_arrays=True)
+        arrays = columns["Voltages"]
+        self.assertEqual(list(arrays["names"]), ["source", "load0", "load1", "load2"])
+        self.assertEqual(list(arrays["nicknames"]), ["", "home", "", ""])
+        self.assertEqual(arrays["values"].dtype, np.float64)
+        self.assertEqual(list(arrays["values"]), list(voltages.values()))
+        self.assertEqual(columns["Losses"], circuit.results(["Losses"])["Losses"])
+
+        # arrays share the cached solution, writing to them must not change later queries
+        with self.assertRaises(ValueError):
+            arrays["values"][0] = 0
+        again = circuit.results(["Voltages"], as_arrays=True)["Voltages"]
+        self.assertEqual(list(again["values"]), list(voltages.values()))
+
+        # buses with several nodes get one value each, the average of their nodes
+        circuit.update_source(params={"phases": 3})
+        circuit.solve()
+        arrays = circuit.results(["Voltages"], as_arrays=True)["Voltages"]
+        self.assertEqual(len(arrays["values"]), len(arrays["names"]))
+        self.assertAlmostEqual(arrays["values"][0], np.mean(circuit.dss.BusVMag()[:3]))
+        # and dicts agree with arrays bus by bus
+        voltages = circuit.results(["Voltages"])["Voltages"]
+        self.assertEqual(list(voltages.values()), list(arrays["values"]))
+
+    def test_021_streaming_export(self):
+        circuit = PyGridSim()
+        circuit.update_source()
+        circuit.add_load_nodes(num=2)
+        circuit.add_lines([("source", "load0"), ("source", "load1")])
+        formats = [".jsonl", ".npz"]
+        formats += [".parquet"] if importlib.util.find_spec("pyarrow") else []
+        formats += [".h5"] if importlib.util.find_spec("h5py") else []
+
+        with tempfile.TemporaryDirectory() as directory:
+            paths = [os.path.join(directory, "sweep" + extension) for extension in formats]
+            for kv in [1, 2, 3]:
+                circuit.update_source(params={"kV": kv})
+                circuit.solve()
+                for path in paths:
+                    circuit.results(["Voltages", "Losses"], export_path=path, as_arrays=True)
+            circuit.close_exports()
+
+            with open(paths[0]) as jsonl_file:
+                runs = [json.loads(line) for line in jsonl_file]
+            self.assertEqual(len(runs), 3)
+            self.assertEqual(runs[2]["Voltages"]["names"][0], "source")
+
+            with np.load(paths[1]) as npz_file:
+                self.assertIn("run2/Voltages/values", npz_file)
+                self.assertEqual(npz_file["run0/Voltages/values"].shape, (3,))
+
+            if ".parquet" in formats:
+                import pyarrow.parquet as pq
+                table = pq.read_table(paths[formats.index(".parquet")])
+                self.assertEqual(sorted(set(table["run"].to_pylist())), [0, 1, 2])
+
+            if ".h5" in formats:
+                import h5py
+                with h5py.File(paths[formats.index(".h5")]) as h5_file:
+                    self.assertEqual(sorted(h5_file), ["run0", "run1", "run2"])
+
+            # other extensions, or none, are written as JSON
+            for name in ["results", "results.txt"]:
+                path = os.path.join(directory, name)
+                circuit.results(["Losses"], export_path=path)
+                with open(path) as json_file:
+                    self.assertIn("Losses", json.load(json_file))
+
+            if ".parquet" in formats:
+                # closed streams are not overwritten, and are closed when the circuit is dropped
+                with self.assertRaises(FileExistsError):
+                    circuit.results(["Losses"], export_path=paths[formats.index(".parquet")])
+                dropped = PyGridSim()
+                path = os.path.join(directory, "dropped.parquet")
+                dropped.results(["Losses"], export_path=path)
+                del dropped
+                gc.collect()
+                self.assertEqual(pq.read_table(path).num_rows, 2)
+
+    def test_022_timeseries(self):
+        circuit = PyGridSim(seed=1)
+        circuit.update_source()
+        circuit.add_load_nodes(num=2, load_type="commercial", names=["shop"])
+        circuit.add_load_nodes(num=1, load_type="house")
+        circuit.add_lines([("source", "shop"), ("source", "load1"), ("source", "load2")])
+        circuit.solve()
+        snapshot_losses = circuit.results(["RealLoss"])["RealLoss"]
+
+        daily = circuit.solve_timeseries()
+        self.assertEqual(list(daily["Hours"]), list(range(1, 25)))
+        self.assertEqual(daily["Voltages"]["values"].shape, (24, 4))
+        self.assertEqual(list(daily["Voltages"]["nicknames"]), ["", "shop", "", ""])
+        losses = daily["Losses"]["Active Power Loss"]
+        self.assertEqual(losses.shape, (24,))
+        # losses follow the load shapes, and never exceed the full-load snapshot
+        self.assertGreater(losses.max() - losses.min(), 0)
+        self.assertLessEqual(losses.max(), snapshot_losses * 1.0001)
+
+        # a flat yearly shape keeps commercial loads at full power
+        circuit.set_loadshape("commercial", [1] * 24, yearly=True)
+        circuit.set_loadshape("house", [1] * 24, yearly=True)
+        yearly = circuit.solve_timeseries("yearly", steps=48)
+        self.assertEqual(yearly["Voltages"]["values"].shape, (48, 4))
+        self.assertAlmostEqual(yearly["Losses"]["Active Power Loss"][30] / snapshot_losses, 1, 4)
+
+        # snapshot solves still work afterwards
+        circuit.solve()
+        self.assertAlmostEqual(circuit.results(["RealLoss"])["RealLoss"], snapshot_losses)
+
+        with self.assertRaises(ValueError):
+            circuit.solve_timeseries("weekly")
+
+    def test_023_incremental_updates(self):
+        circuit = PyGridSim(seed=1)
+        circuit.update_source(params={"kV": 50})
+        circuit.add_load_nodes(num=2, params={"kV": 10, "kW": 20, "kvar": 1}, names=["house"])
+        circuit.add_generators(params={"kV": 10, "kW": 5})
+        circuit.add_lines([("source", "house"), ("house", "load1"), ("generator0", "load1")],
+                          params={"length": 1})
+        circuit.solve()
+        losses = circuit.results(["RealLoss"])["RealLoss"]
+
+        circuit.update_load("house", {"kW": 200})
+        circuit.solve()
+        # warm start: the re-solve begins from the previous solution
+        self.assertLessEqual(circuit.dss.Solution.Iterations, 5)
+        self.assertGreater(circuit.results(["RealLoss"])["RealLoss"], losses)
+
+        circuit.update_line("line1", {"length": 20, "XHL": 3})
+        circuit.update_generator("generator0", {"kW": 50})
+        circuit.solve()
+        self.assertEqual(circuit.dss.Line["line1"].Length, 20)
+        self.assertEqual(circuit.dss.Generator["generator0"].kW, 50)
+
+        # transformer windings follow a node's new kV
+        circuit.update_load("load1", {"kV": 12})
+        self.assertEqual(circuit.dss.Transformer["transformer1"].kVs[1], 12)
+
+        with self.assertRaises(KeyError):
+            circuit.update_load("missing", {"kW": 1})
+        with self.assertRaises(KeyError):
+            circuit.update_line("line0", {"bad_param": 1})
+        with self.assertRaises(ValueError):
+            circuit.update_line("line0", {"length": -1})
+        circuit.clear()
+
+    def test_024_load_spec(self):
+        spec = {
+            "source": {"source_type": "turbine", "params": {"kV": 10}},
+            "loads": [{"load_type": "house", "num": 3, "names": ["home"]},
+                      {"load_type": "commercial"}],
+            "generators": [{"gen_type": "small"}],
+            "pv": [{"load_nodes": ["home"], "num_panels": 2}],
+            "lines": [{"connections": [["source", "home"], ["home", "load1"], ["load1", "load2"],
+                                       ["source", "load3"], ["generator0", "load2"]]}],
+        }
+        # a spec builds the same circuit as the matching add_* calls with the same seed
+        circuit = PyGridSim(seed=4)
+        circuit.update_source(source_type="turbine", params={"kV": 10})
+        circuit.add_load_nodes(load_type="house", num=3, names=["home"])
+        circuit.add_load_nodes(load_type="commercial")
+        circuit.add_generators(gen_type="small")
+        circuit.add_PVSystems(load_nodes=["home"], num_panels=2)
+        circuit.add_lines([("source", "home"), ("home", "load1"), ("load1", "load2"),
+                           ("source", "load3"), ("generator0", "load2")])
+        circuit.solve()
+        expected = circuit.results(["Voltages", "Losses", "TotalPower"])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "spec.json")
+            with open(path, "w") as spec_file:
+                json.dump(spec, spec_file)
+            spec_circuit = PyGridSim(seed=4)
+            spec_circuit.load_spec(path)
+        spec_circuit.solve()
+        self.assertEqual(spec_circuit.results(["Voltages", "Losses", "TotalPower"]), expected)
+        self.assertEqual((spec_circuit.num_loads, spec_circuit.num_lines), (4, 5))
+
+        # an invalid entry leaves the circuit untouched
+        with self.assertRaises(KeyError):
+            spec_circuit.load_spec({"loads": [{"num": 2, "names": ["shop"]}],
+                                    "lines": [{"connections": [["shop", "missing"]]}]})
+        with self.assertRaises(KeyError):
+            spec_circuit.load_spec({"switches": []})
+        self.assertEqual(spec_circuit.num_loads, 4)
+        self.assertNotIn("shop", spec_circuit.nickname_to_name)
+        self.assertEqual(len(spec_circuit.dss.Load), 4)
+        with self.assertRaises(ValueError):
+            spec_circuit.load_spec({"lines": [{"connections": [["load3", 'bad "bus"']],
+                                               "transformer": False}]})
+        self.assertEqual(len(spec_circuit.dss.Line), 5)
+
+        # names with spaces are quoted in the script
+        spec_circuit.load_spec({"lines": [{"connections": [["load3", "bad bus"]],
+                                           "transformer": False}]})
+        self.assertEqual(spec_circuit.dss.Line["line5"].Bus2, "bad bus")
+
+        # a script the engine stops partway leaves an element the counters do not know of,
+        # and adding it again fails instead of creating a second element of the same name
+        def stop_after_first(dss, script):
+            dss(script.split("\n")[0])
+            raise RuntimeError("engine stopped")
+
+        with mock.patch("pygridsim.core._run_script", side_effect=stop_after_first):
+            with self.assertRaises(RuntimeError):
+                spec_circuit.load_spec({"loads": [{"num": 2}]})
+        self.assertEqual((spec_circuit.num_loads, len(spec_circuit.dss.Load)), (4, 5))
+        with self.assertRaises(Exception):
+            spec_circuit.add_load_nodes(num=1)
+        self.assertEqual(len(spec_circuit.dss.Load), 5)
+
+    def test_025_circuit_cache(self):
+        spec = {"source": {}, "loads": [{"num": 3, "names": ["home"]}],
+                "lines": [{"connections": [["source", "home"], ["home", "load1"],
+                                           ["source", "load2"]]}]}
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = CircuitCache(tmp)
+            built = cache.build(spec, seed=5)
+            restored = cache.build(spec, seed=5)
+            self.assertEqual((cache.hits, cache.misses), (1, 1))
+            built.solve()
+            restored.solve()
+            self.assertEqual(restored.results(["Voltages", "Losses"]),
+                             built.results(["Voltages", "Losses"]))
+            self.assertEqual(restored.nickname_to_name, {"home": "load0"})
+            # a restored circuit keeps drawing the same parameters as the fresh build
+            self.assertEqual(restored.sampler.sample([0, 1]), built.sampler.sample([0, 1]))
+
+            # other seeds miss, and unseeded builds are never cached
+            cache.build(spec, seed=6)
+            cache.build(spec)
+            self.assertEqual((cache.hits, cache.misses), (1, 2))
+            self.assertEqual(len(os.listdir(tmp)), 2)
+
+            # least recently used entries are evicted past the size cap
+            small_cache = CircuitCache(tmp, max_bytes=cache.size() * 5 // 4)
+            small_cache.build(spec, seed=5)
+            small_cache.build(spec, seed=7)
+            self.assertEqual(small_cache.misses, 1)
+            self.assertEqual(sorted(os.listdir(tmp)),
+                             sorted(small_cache.key(spec, seed) + ".json" for seed in [5, 7]))
+
+    def test_026_node_index(self):
+        circuit = PyGridSim(seed=2)
+        circuit.update_source(params={"kV": 20})
+        circuit.add_load_nodes(num=3, params={"kV": 0.5}, names=["home"])
+        circuit.add_generators(params={"kV": 0.4, "phases": 3})
+        self.assertEqual(circuit.node_index["source"], ("source", 20, 1))
+        self.assertEqual(circuit.node_index["load2"], ("load", 0.5, 1))
+        self.assertEqual(circuit.node_index["generator0"], ("generator", 0.4, 3))
+
+        # whole edge lists can be passed as arrays, transformer kVs come from the index
+        connections = np.array([["source", "home"], ["home", "load1"], ["home", "load2"],
+                                ["generator0", "load1"]])
+        circuit.add_lines(connections, params={"length": 1})
+        self.assertEqual(circuit.num_lines, 4)
+        self.assertEqual(list(circuit.dss.Transformer["transformer3"].kVs), [0.4, 0.5])
+
+        circuit.update_load("load1", {"kV": 0.6})
+        self.assertEqual(circuit.node_index["load1"].kV, 0.6)
+
+        # unknown nodes are rejected before any line is created
+        with self.assertRaises(KeyError):
+            circuit.add_lines([("load0", "load2"), ("load0", "missing")])
+        self.assertEqual(len(circuit.dss.Line), 4)
+        with self.assertRaises(ValueError):
+            circuit.add_lines(np.array([["home", "load0"]]))
+
+        # endpoints are quoted in the script, names the parser cannot take are rejected
+        circuit.add_lines([("load0", "bad bus")], transformer=False)
+        self.assertEqual(circuit.dss.Line["line4"].Bus2, "bad bus")
+        with self.assertRaises(ValueError):
+            circuit.add_lines([("load2", "load1"), ("load0", 'bad "bus"')], transformer=False)
+        circuit.add_lines([("load2", "load1")], transformer=False)
+        self.assertEqual(circuit.dss.Line.Name, ["line" + str(i) for i in range(6)])
+
+    def test_027_topology(self):
+        circuit = PyGridSim(seed=3)
+        circuit.update_source()
+        circuit.add_load_nodes(num=6, names=["home"])
+        circuit.add_generators()
+        circuit.add_lines([("source", "home"), ("home", "load1"), ("load1", "load2"),
+                           ("home", "load3"), ("load4", "load5")])
+        report = circuit.check_topology()
+        self.assertEqual(report["unreachable"], ["load4", "load5", "generator0"])
+        self.assertEqual(report["islands"], [["load4", "load5"], ["generator0"]])
+        self.assertEqual((report["cycles"], report["radial"]), (0, False))
+        self.assertEqual(circuit.downstream("home"), ["load1", "load3", "load2"])
+        self.assertEqual(circuit.downstream("load2"), [])
+        with self.assertRaises(ValueError):
+            circuit.solve(check_topology=True)
+
+        # closing the gaps makes one meshed network
+        circuit.add_lines([("load2", "load4"), ("generator0", "load5"), ("load3", "load5")])
+        report = circuit.check_topology()
+        self.assertEqual((report["unreachable"], report["cycles"]), ([], 1))
+        circuit.solve(check_topology=True)
+
+        topology = TopologyIndex()
+        topology.add_edges([("source", "a"), ("a", "b")])
+        self.assertTrue(topology.is_radial())
+        with self.assertRaises(KeyError):
+            topology.downstream("missing")
+
+    def test_028_generate_feeder(self):
+        loads = {"house": 30, "commercial": 8, "industrial": 2}
+        circuit = generate_feeder(loads, branching=3, line_types={"lv": 0.7, "mv": 0.3}, seed=9)
+        self.assertEqual((circuit.num_loads, circuit.num_lines), (40, 40))
+        report = circuit.check_topology()
+        self.assertTrue(report["radial"])
+        self.assertEqual(len(circuit.downstream("source")), 40)
+        circuit.solve()
+
+        # the same seed generates the same feeder
+        same = generate_feeder(loads, branching=3, line_types={"lv": 0.7, "mv": 0.3}, seed=9)
+        same.solve()
+        self.assertEqual(same.results(["Voltages"]), circuit.results(["Voltages"]))
+
+        meshed = generate_feeder({"house": 50}, branching=2, mesh=0.2, seed=9)
+        self.assertEqual(meshed.num_lines, 60)
+        self.assertEqual(meshed.check_topology()["cycles"], 10)
+
+        with self.assertRaises(ValueError):
+            generate_feeder({"house": 5}, branching=0)
+        with self.assertRaises(KeyError):
+            generate_feeder({"house": 5}, line_types={"xv": 1})
+
+    def test_029_profiling(self):
+        timings = []
+        profiler = Profiler(hooks=[lambda name, seconds: timings.append(name)])
+        circuit = PyGridSim(seed=1, profiler=profiler)
+        circuit.update_source()
+        circuit.add_load_nodes(num=3)
+        circuit.add_lines([("source", "load0"), ("load0", "load1"), ("load1", "load2")])
+        circuit.solve()
+        circuit.results(["Voltages", "Losses"])
+
+        stats = profiler.as_dict()
+        for name in ["add_load_nodes", "_make_load_nodes", "add_lines", "_compile_lines",
+                     "_run_script", "solve", "Solution.Solve", "results"]:
+            self.assertEqual(stats[name]["calls"], 1)
+        self.assertEqual(stats["_query_solution"]["calls"], 2)
+        self.assertGreaterEqual(stats["solve"]["total_seconds"],
+                                stats["Solution.Solve"]["total_seconds"])
+        self.assertEqual(len(timings), sum(entry["calls"] for entry in stats.values()))
+        self.assertIn("Solution.Solve", profiler.report())
+
+        # circuits sharing a profiler aggregate, and disabled circuits record nothing
+        other = PyGridSim(profiler=profiler)
+        other.solve()
+        self.assertEqual(profiler.stats["solve"].calls, 2)
+        disabled = PyGridSim()
+        disabled.solve()
+        self.assertEqual(disabled.profiler.as_dict(), {})
+        self.assertTrue(PyGridSim(profiler=True).profiler.enabled)
+
+    def test_030_sweep(self):
+        circuit = PyGridSim(seed=12)
+        _build_scenario(circuit)
+        sweep = circuit.sweep("load0", "kW", [1, 10, 100])
+        self.assertEqual(sweep["Voltages"]["values"].shape, (3, 4))
+        self.assertEqual(list(sweep["Voltages"]["names"]), ["source", "load0", "load1", "load2"])
+        losses = sweep["Losses"]["Active Power Loss"]
+        self.assertTrue(np.all(np.diff(losses) > 0))
+
+        # a grid point matches a circuit built and solved from scratch
+        axes = [("source", "kV", [2, 3]), ("line1", "length", [5, 10, 20]),
+                ("load2", "kW", [1, 2])]
+        grid = circuit.sweep(axes, queries=["Voltages", "RealLoss"])
+        self.assertEqual(grid["Voltages"]["values"].shape, (2, 3, 2, 4))
+        self.assertEqual(grid["RealLoss"].shape, (2, 3, 2))
+        fresh = PyGridSim(seed=12)
+        _build_scenario(fresh)
+        fresh.update_load("load0", {"kW": 100})
+        fresh.update_source(params={"kV": 3})
+        fresh.update_line("line1", {"length": 10})
+        fresh.update_load("load2", {"kW": 2})
+        fresh.solve()
+        self.assertAlmostEqual(grid["RealLoss"][1, 1, 1] / fresh.results(["RealLoss"])["RealLoss"],
+                               1, 6)
+
+        # splitting the grid across workers gives the same arrays
+        serial = run_sweep(_build_scenario, axes, queries=["RealLoss"], workers=1, seed=12)
+        parallel = run_sweep(_build_scenario, axes, queries=["RealLoss"], workers=2, seed=12)
+        np.testing.assert_allclose(parallel["RealLoss"], serial["RealLoss"])
+
+        with self.assertRaises(ValueError):
+            circuit.sweep("load0", "kW", [])
+        with self.assertRaises(KeyError):
+            circuit.sweep("load0", "length", [1])
+
+    def test_031_hosting_capacity(self):
+        circuit = PyGridSim(seed=5)
+        _build_scenario(circuit)
+        circuit.solve()
+        before = circuit.results(["RealLoss"])["RealLoss"]
+        loose = circuit.hosting_capacity(v_max=1.005)
+        tight = circuit.hosting_capacity(v_max=1.002, tolerance=0.5)
+        self.assertEqual(list(tight["names"]), ["load0", "load1", "load2"])
+        self.assertTrue(np.all(tight["values"] > 0))
+        self.assertTrue(np.all(tight["values"] < loose["values"]))
+        self.assertEqual(circuit.hosting_capacity(v_max=1.5)["values"].tolist(), [1000] * 3)
+        # the probe is disabled afterwards, so the circuit solves as built
+        circuit.solve()
+        self.assertAlmostEqual(circuit.results(["RealLoss"])["RealLoss"] / before, 1)
+
+        one = circuit.hosting_capacity(["load1"], v_max=1.002, tolerance=0.5)
+        self.assertEqual(one["values"][0], tight["values"][1])
+        parallel = run_hosting_capacity(_build_scenario, v_max=1.002, tolerance=0.5, workers=2,
+                                        seed=5)
+        np.testing.assert_array_equal(parallel["names"], tight["names"])
+        np.testing.assert_allclose(parallel["values"], tight["values"])
+
+        with self.assertRaises(KeyError):
+            circuit.hosting_capacity(["source"])
+        with self.assertRaises(ValueError):
+            circuit.hosting_capacity(v_min=1.1, v_max=1.05)
+
+        # every node of a multi-phase bus is checked against the bus's line to neutral base
+        three_phase = PyGridSim(seed=5)
+        three_phase.update_source(params={"phases": 3})
+        three_phase.add_load_nodes(num=3)
+        three_phase.add_lines([("source", "load0"), ("load0", "load1"), ("source", "load2")])
+        capacity = three_phase.hosting_capacity(v_min=0.5, v_max=1.005, max_kw=1e5)["values"]
+        self.assertTrue(np.all((capacity > 0) & (capacity < 1e5)))
+        self.assertEqual(three_phase.hosting_capacity(v_min=0.5, v_max=0.9)["values"].tolist(),
+                         [0] * 3)
+        # the engine's default source bus has three nodes too
+        default_source = PyGridSim()
+        default_source.add_load_nodes(num=2, params={"phases": 3})
+        default_source.add_lines([("source", "load0"), ("load0", "load1")])
+        self.assertEqual(len(default_source.hosting_capacity()["values"]), 2)
+
+    def test_032_element_queries(self):
+        circuit = PyGridSim(seed=3)
+        circuit.update_source()
+        circuit.add_load_nodes(num=3, names=["a", "b", "c"])
+        circuit.add_generators(num=1)
+        circuit.add_lines([("source", "a"), ("a", "b"), ("source", "c"), ("generator0", "c")])
+        circuit.solve()
+        queries = ["LineCurrents", "LinePowers", "LoadPowers", "GeneratorOutput",
+                   "TransformerLoading"]
+        results = circuit.results(queries)
+        self.assertEqual(list(results["LineCurrents"]["names"]),
+                         ["line0", "line1", "line2", "line3"])
+        self.assertTrue(np.all(results["LineCurrents"]["values"] > 0))
+        self.assertEqual(list(results["LoadPowers"]["nicknames"]), ["a", "b", "c"])
+        self.assertEqual(list(results["TransformerLoading"]["names"]),
+                         ["transformer0", "transformer1", "transformer2", "transformer3"])
+
+        # bulk arrays agree with the engine's element by element values
+        dss = circuit.dss
+        load_kw = [dss.Load[name].TotalPowers()[0].real for name in ["load0", "load1", "load2"]]
+        np.testing.assert_allclose(results["LoadPowers"]["Active Power"], load_kw)
+        self.assertAlmostEqual(results["LinePowers"]["Active Power"][1],
+                               dss.Line["line1"].Powers()[0].real)
+        self.assertAlmostEqual(results["GeneratorOutput"]["Active Power"][0],
+                               -dss.Generator["generator0"].Powers()[0].real)
+        transformer = dss.Transformer["transformer2"]
+        self.assertAlmostEqual(results["TransformerLoading"]["values"][2],
+                               100 * abs(transformer.TotalPowers()[0]) / transformer.kVAs[0])
+
+        empty = PyGridSim()
+        empty.update_source()
+        empty.solve()
+        self.assertEqual(empty.results(["LinePowers"])["LinePowers"]["Active Power"].shape, (0,))
+
+    def test_033_async(self):
+        async def run():
+            circuits = [AsyncPyGridSim(seed=seed) for seed in range(3)]
+            await asyncio.gather(*(circuit.build(_build_scenario) for circuit in circuits))
+            await asyncio.gather(*(circuit.solve() for circuit in circuits))
+            losses = await asyncio.gather(*(circuit.results(["RealLoss"])
+                                            for circuit in circuits))
+
+            circuit = circuits[0]
+            before = await circuit.results(["Voltages"])
+            with self.assertRaises(asyncio.TimeoutError):
+                await circuit.call("add_load_nodes", num=20000, timeout=0.01)
+            task = asyncio.create_task(circuit.call("add_load_nodes", num=20000))
+            await asyncio.sleep(0.1)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            # the interrupted calls are dropped, and the circuit is rebuilt as it was
+            after = await circuit.results(["Voltages"])
+            with self.assertRaises(KeyError):
+                await circuit.call("update_load", "missing", {"kW": 1})
+
+            # a sweep is replayed by setting its last point, hosting capacity is not replayed
+            await circuit.call("sweep", "load0", "kW", [1, 2], queries=["RealLoss"])
+            await circuit.call("hosting_capacity", max_kw=10)
+            self.assertEqual(circuit.history[-2:], [("_update_target", ("load0", {"kW": 2}), {}),
+                                                    ("solve", (), {})])
+            swept = await circuit.results(["RealLoss"])
+            with self.assertRaises(asyncio.TimeoutError):
+                await circuit.call("add_load_nodes", num=20000, timeout=0.01)
+            # the timeout covers rebuilding the circuit in a new worker
+            with self.assertRaises(asyncio.TimeoutError):
+                await circuit.results(["RealLoss"], timeout=0.001)
+            rebuilt = await circuit.results(["RealLoss"])
+            self.assertAlmostEqual(rebuilt["RealLoss"] / swept["RealLoss"], 1)
+
+            threads = threading.active_count()
+            for circuit in circuits:
+                await circuit.close()
+            # closing releases the thread reading each worker's replies
+            self.assertEqual(threading.active_count(), threads - len(circuits))
+            return losses, before, after
+
+        losses, before, after = asyncio.run(run())
+        for seed, result in enumerate(losses):
+            circuit = PyGridSim(seed=seed)
+            _build_scenario(circuit)
+            circuit.solve()
+            self.assertEqual(result, circuit.results(["RealLoss"]))
+        self.assertEqual(before, after)
+
+    def test_034_lazy_engine(self):
+        # metadata calls in a fresh process never load the engine
+        probe = ("import sys, pygridsim; circuit = pygridsim.PyGridSim(); "
+                 "circuit.get_types('load'); circuit.check_topology(); "
+                 "print('altdss' in sys.modules, circuit._engine_started)")
+        output = subprocess.run([sys.executable, "-c", probe], check=True, capture_output=True,
+                                text=True).stdout
+        self.assertEqual(output.split(), ["False", "False"])
+
+        circuit = PyGridSim()
+        self.assertEqual(circuit.node_index["source"], ("source", 115, 3))
+        self.assertFalse(circuit._engine_started)
+        circuit.add_load_nodes(num=1)
+        circuit.add_lines([("source", "load0")])
+        circuit.solve()
+        self.assertTrue(circuit._engine_started)
+        # the engine's default source matches the one indexed before the engine started
+        source = circuit.dss.Vsource[0]
+        self.assertEqual((source.BasekV, source.Phases), circuit.node_index["source"][1:])
+
+    def test_035_component_model(self):
+        spec = {"source": {"params": {"kV": 10}},
+                "loads": [{"num": 3, "names": ["home"]}],
+                "generators": [{"num": 1}],
+                "pv": [{"load_nodes": ["home"]}],
+                "lines": [{"connections": [["source", "home"], ["home", "load1"],
+                                           ["load1", "generator0"]]}]}
+        circuit = PyGridSim(seed=4)
+        circuit.update_source(params={"kV": 10})
+        circuit.add_load_nodes(num=3, names=["home"])
+        circuit.add_generators(num=1)
+        circuit.add_PVSystems(["home"])
+        circuit.add_lines([("source", "home"), ("home", "load1"), ("load1", "generator0")])
+        model = circuit.model
+        self.assertEqual(model.table("load").dtype.itemsize, 26)
+        self.assertEqual(len(model), 1 + 3 + 1 + 1 + 3)
+        np.testing.assert_allclose(model.table("load")["kW"], circuit.dss.Load.kW, rtol=1e-6)
+        self.assertEqual(list(model.names("line")), ["line0", "line1", "line2"])
+        self.assertEqual(list(model.buses("line", 2)), ["load0", "load1", "generator0"])
+        self.assertEqual(list(model.buses("pv")), ["load0"])
+        self.assertTrue(np.all(np.isnan(model.table("load")["length"])))
+
+        # the same circuit built from a spec has the same model
+        from_spec = PyGridSim(seed=4)
+        from_spec.load_spec(spec)
+        self.assertEqual(model.diff(from_spec.model), {})
+
+        # updates show up in the model, including fields the engine derives
+        circuit.update_load("home", {"kW": 7})
+        circuit.update_line("line2", {"length": 3})
+        self.assertEqual(model.table("load")["kW"][0], 7)
+        self.assertAlmostEqual(model.table("load")["kvar"][0], circuit.dss.Load[0].kvar, 4)
+        diff = model.diff(from_spec.model)
+        self.assertEqual(set(diff), {"load", "line"})
+        self.assertEqual(list(diff["load"]["changed"]), ["load0"])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "model.npz")
+            model.save(path)
+            loaded = CircuitModel.load(path)
+        self.assertEqual(loaded.diff(model), {})
+        self.assertEqual(list(loaded.buses("line")), ["source", "load0", "load1"])
+
+        # the hosting capacity probe shifts engine indices, new PV systems are read by name
+        circuit.hosting_capacity(buses=["load1"])
+        circuit.add_PVSystems(["load2"], params={"kV": 0.3})
+        circuit.load_spec({"pv": [{"load_nodes": ["load1"], "params": {"kV": 0.4}}]})
+        np.testing.assert_allclose(model.table("pv")["kV"][1:], [0.3, 0.4], rtol=1e-6)
+        self.assertEqual(list(model.buses("pv")), ["load0", "load2", "load1"])
+
+    def test_036_name_registry(self):
+        circuit = PyGridSim()
+        circuit.add_load_nodes(num=3, names=["home", "shop"])
+        circuit.add_generators(num=2, names=["plant"])
+        circuit.add_load_nodes(num=1, names=["barn"])
+        names = circuit.names
+        self.assertIsInstance(names, NameRegistry)
+        self.assertEqual(dict(names), {"home": "load0", "shop": "load1", "plant": "generator0",
+                                       "barn": "load3"})
+        self.assertEqual(names.inverse["load3"], "barn")
+        self.assertIsNone(names.inverse.get("load2"))
+        self.assertEqual(names.resolve("shop"), "load1")
+        self.assertEqual(names.resolve("load2"), "load2")
+        self.assertEqual(list(names.nicknames(["load0", "load2", "generator0"])),
+                         ["home", "", "plant"])
+
+        # a bad list is rejected as a whole, registering none of its names
+        for bad in [["new", "new"], ["new", "home"], ["new", "load_x"]]:
+            with self.assertRaises(ValueError):
+                circuit.add_load_nodes(num=2, names=bad)
+            self.assertNotIn("new", names)
+        self.assertEqual(len(names), 4)
+
+        circuit.add_lines([("source", "home"), ("home", "shop")])
+        circuit.solve()
+        voltages = circuit.results(["Voltages"], as_arrays=True)["Voltages"]
+        self.assertEqual(list(voltages["nicknames"][voltages["names"] == "load1"]), ["shop"])
+        powers = circuit.results(["loadpowers"])["loadpowers"]
+        self.assertEqual(list(powers["nicknames"][:2]), ["home", "shop"])
+
+    def test_037_sharding(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            queue = DirectoryQueue(os.path.join(tmp, "queue"))
+            output = os.path.join(tmp, "scenarios")
+            self.assertEqual(submit_scenarios(queue, output, _build_scenario, 5, seed=3,
+                                              shard_size=2), 3)
+            self.assertEqual(run_worker(queue, max_shards=1), 1)
+            with self.assertRaises(ValueError):
+                merge_shards(output)
+            # a second run in the same directory would overwrite the first one's shards
+            with self.assertRaises(FileExistsError):
+                submit_scenarios(queue, output, _build_scenario, 3, seed=4)
+
+            # a shard claimed by a worker that died is requeued and run by another one
+            self.assertEqual(queue.get()["id"], 1)
+            self.assertEqual(queue.requeue(timeout=60), 0)
+            self.assertEqual(queue.requeue(), 1)
+            self.assertEqual(run_worker(queue), 2)
+            self.assertEqual(merge_shards(output),
+                             run_scenarios(_build_scenario, 5, workers=1, seed=3))
+
+            axes = [("load0", "kW", [1, 2, 3]), ("line1", "length", [1, 2])]
+            output = os.path.join(tmp, "sweep")
+            with (ShardBroker() as broker,
+                  BrokerQueue(broker.address, broker.authkey) as broker_queue):
+                # every broker has its own random key, a client without it is refused
+                with self.assertRaises(AuthenticationError):
+                    BrokerQueue(broker.address, b"pygridsim")
+                self.assertEqual(submit_sweep(broker_queue, output, _build_scenario, axes,
+                                              queries=["RealLoss"], seed=4, shard_size=4), 2)
+                # sweep shards reuse the worker's engine context too
+                with mock.patch("pygridsim.core._new_context",
+                                wraps=_new_context) as new_context:
+                    self.assertEqual(run_worker(broker_queue), 2)
+                self.assertEqual(new_context.call_count, 0)
+            sweep = merge_shards(output)
+            serial = run_sweep(_build_scenario, axes, queries=["RealLoss"], workers=1, seed=4)
+            np.testing.assert_allclose(sweep["RealLoss"], serial["RealLoss"])
+
+    def test_038_fault_study(self):
+        circuit = PyGridSim(seed=5)
+        circuit.update_source()
+        circuit.add_load_nodes(num=2, names=["near", "far"])
+        circuit.add_lines([("source", "near"), ("near", "far")])
+        circuit.solve()
+        voltages = circuit.results(["Voltages"])["Voltages"]
+        faults = circuit.fault_study()
+        self.assertEqual(list(faults["names"]), ["source", "load0", "load1"])
+        self.assertEqual(list(faults["nicknames"]), ["", "near", "far"])
+        self.assertEqual(set(faults), {"names", "nicknames", "3PH", "SLG"})
+        # fault currents drop along the feeder
+        self.assertTrue(np.all(np.diff(faults["3PH"]) < 0))
+        self.assertTrue(np.all(faults["SLG"] > 0))
+        # the circuit is solved in snapshot mode again
+        self.assertEqual(circuit.results(["Voltages"])["Voltages"], voltages)
+
+        # one fault placed and solved at a time gives the same current
+        circuit.dss("new fault.test bus1=load1 phases=1 r=0.0001")
+        circuit.dss.Solution.Solve()
+        current = np.abs(circuit.dss.Fault["test"].Currents()[0])
+        slg = circuit.fault_study(["slg"], fault_resistance=0.0001)
+        self.assertEqual(set(slg), {"names", "nicknames", "SLG"})
+        self.assertAlmostEqual(slg["SLG"][2] / current, 1, 3)
+
+        with self.assertRaises(ValueError):
+            circuit.fault_study(["LL"])
+        with self.assertRaises(ValueError):
+            circuit.fault_study(fault_resistance=-1)
+
 
 class TestCustomizedCircuit(unittest.TestCase):
     """